@@ -0,0 +1,98 @@
+import fnmatch
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+DEFAULT_DIRECTORIES = ("configs", ".generated")
+# Directory and file name patterns never indexed: captures, caches and results
+DEFAULT_IGNORE = (
+    ".git", "__pycache__", ".llm_worker_cache", ".uhd_images", ".log_spill",
+    "pool", "store", "logs", "*results*", "*.wal", "*.bin", "*.dat", "*.fc32", "*.iq", "*.sigmf-data",
+)
+
+
+class ConfigIndex:
+    """
+    Basename index of the config directories under the system directory,
+    used to find a process config_file that is not at its configured path
+    Built on first use and cached; rebuilt by refresh() and when a lookup
+    misses or finds a file that is gone, so files added while the controller
+    runs are found by config reloads
+    """
+
+    def __init__(
+        self,
+        root: str = "/host",
+        directories: Iterable[str] = DEFAULT_DIRECTORIES,
+        ignore: Iterable[str] = DEFAULT_IGNORE,
+    ):
+        self.root = root
+        self.directories = list(directories)
+        self.ignore = list(ignore)
+        self.paths: Optional[Dict[str, List[str]]] = None
+        self.lock = threading.Lock()
+
+    def refresh(self) -> None:
+        build_began = time.monotonic()
+        paths: Dict[str, List[str]] = {}
+        for directory in self.directories:
+            for root, dirs, files in os.walk(os.path.join(self.root, directory)):
+                dirs[:] = sorted(name for name in dirs if not self._ignored(name))
+                for name in sorted(files):
+                    if not self._ignored(name):
+                        paths.setdefault(name, []).append(os.path.join(root, name))
+        with self.lock:
+            self.paths = paths
+
+        ambiguous = sorted(name for name, candidates in paths.items() if len(candidates) > 1)
+        logging.debug(
+            f"Config index built with {len(paths)} names in {time.monotonic() - build_began:.3f}s"
+        )
+        if ambiguous:
+            logging.debug(f"Config names found in several directories: {', '.join(ambiguous)}")
+
+    def candidates(self, basename: str) -> List[str]:
+        with self.lock:
+            built = self.paths is not None
+        if not built:
+            self.refresh()
+        with self.lock:
+            return list(self.paths.get(basename, []))
+
+    def resolve(self, config_path: str) -> str:
+        """
+        Finds the indexed file that best matches a missing config path:
+        same basename and the longest run of matching parent directories
+        Raises RuntimeError when nothing or several files match equally well
+        """
+        candidates = self.candidates(os.path.basename(config_path))
+        if not candidates or not all(os.path.exists(candidate) for candidate in candidates):
+            self.refresh()
+            candidates = self.candidates(os.path.basename(config_path))
+        if not candidates:
+            raise RuntimeError(f"config file {config_path} not found")
+        if len(candidates) == 1:
+            return candidates[0]
+
+        wanted = config_path.split(os.sep)
+
+        def matching_parts(candidate):
+            parts = candidate.split(os.sep)
+            count = 0
+            while count < min(len(parts), len(wanted)) and parts[-1 - count] == wanted[-1 - count]:
+                count += 1
+            return count
+
+        scores = {candidate: matching_parts(candidate) for candidate in candidates}
+        best = max(scores.values())
+        matches = [candidate for candidate, score in scores.items() if score == best]
+        if len(matches) > 1:
+            raise RuntimeError(
+                f"config file {config_path} not found and its name is ambiguous: {', '.join(matches)}"
+            )
+        return matches[0]
+
+    def _ignored(self, name: str) -> bool:
+        return any(fnmatch.fnmatch(name, pattern) for pattern in self.ignore)
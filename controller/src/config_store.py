@@ -0,0 +1,116 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import Dict, Set
+
+STORE_DIRECTORY = "/host/.generated/store"
+
+
+class ConfigStore:
+    """
+    Content-addressed store for configs rendered by /start
+    Each distinct config is written once as <sha256>.<ext>, read-only, and
+    shared by every component started with it
+    Files no component references are removed after retention_s, so a config
+    started again shortly after is reused without being rewritten
+    """
+
+    def __init__(self, directory: str = STORE_DIRECTORY, retention_s: float = 600):
+        self.directory = directory
+        self.retention = float(retention_s)
+        self.references: Dict[str, Set[str]] = {}
+        self.owners: Dict[str, str] = {}
+        self.released: Dict[str, float] = {}
+        self.lock = threading.Lock()
+        self.stats = {"written": 0, "reused": 0, "collected": 0}
+
+    def put(self, component_id: str, config_str: str, extension: str) -> str:
+        """
+        Stores config_str for component_id and returns its path
+        """
+        data = config_str.encode("utf-8")
+        path = os.path.join(self.directory, f"{hashlib.sha256(data).hexdigest()}.{extension}")
+        with self.lock:
+            if os.path.exists(path):
+                self.stats["reused"] += 1
+            else:
+                os.makedirs(self.directory, exist_ok=True)
+                temporary_path = f"{path}.{component_id}.tmp"
+                with open(temporary_path, "wb") as f:
+                    f.write(data)
+                os.chmod(temporary_path, 0o444)
+                os.replace(temporary_path, path)
+                self.stats["written"] += 1
+            self._release(component_id)
+            self.references.setdefault(path, set()).add(component_id)
+            self.owners[component_id] = path
+            self.released.pop(path, None)
+        return path
+
+    def adopt(self, component_id: str, path: str) -> bool:
+        """
+        Re-registers component_id as a user of an existing stored config,
+        used for components adopted from a previous controller run
+        """
+        if os.path.dirname(path) != self.directory or not os.path.exists(path):
+            return False
+        with self.lock:
+            self._release(component_id)
+            self.references.setdefault(path, set()).add(component_id)
+            self.owners[component_id] = path
+            self.released.pop(path, None)
+        return True
+
+    def release(self, component_id: str) -> None:
+        """
+        Drops component_id's reference and collects expired unreferenced files
+        """
+        with self.lock:
+            self._release(component_id)
+        self.collect()
+
+    def collect(self) -> int:
+        """
+        Removes unreferenced files older than the retention period,
+        including files left by a previous controller run
+        """
+        now = time.time()
+        removed = 0
+        with self.lock:
+            try:
+                names = os.listdir(self.directory)
+            except FileNotFoundError:
+                return 0
+            for name in names:
+                path = os.path.join(self.directory, name)
+                if self.references.get(path):
+                    continue
+                try:
+                    last_used = self.released.get(path, os.path.getmtime(path))
+                    if now - last_used < self.retention:
+                        continue
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                self.released.pop(path, None)
+                removed += 1
+            self.stats["collected"] += removed
+        if removed:
+            logging.debug(f"Config store removed {removed} unreferenced configs")
+        return removed
+
+    def get_stats(self) -> Dict[str, int]:
+        with self.lock:
+            return dict(self.stats, referenced=sum(1 for owners in self.references.values() if owners))
+
+    def _release(self, component_id: str) -> None:
+        path = self.owners.pop(component_id, None)
+        if path is None:
+            return
+        owners = self.references.get(path, set())
+        owners.discard(component_id)
+        if not owners:
+            self.references.pop(path, None)
+            self.released[path] = time.time()
@@ -0,0 +1,220 @@
+import logging
+import os
+import threading
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Deque, Dict, Optional, Tuple
+
+import docker
+
+from globals import Config
+from state_store import host_to_local
+
+POOL_LABEL = "rt.pool"
+POOL_DIRECTORY = "/host/.generated/pool"
+
+
+def config_file_extension(component_type: str) -> str:
+    return {
+        "rtue": "conf",
+        "sniffer": "toml"
+    }.get(component_type, "yaml")
+
+
+def host_path(path: str) -> str:
+    """
+    Translates a path under the controller's /host mount to the host path
+    """
+    return path.replace("/host", os.getenv("DOCKER_SYSTEM_DIRECTORY"), 1)
+
+
+def remove_slot_config(config_file: str) -> None:
+    """
+    Removes the config file of a slot taken from the pool, given as the host path
+    the component was started with; paths outside the pool are left alone
+    """
+    path = host_to_local(config_file)
+    if os.path.dirname(path) != POOL_DIRECTORY:
+        return
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def discard_slot(container, config_file: str) -> None:
+    """
+    Removes a slot taken from the pool that could not be started:
+    its container, possibly already renamed, and its config file
+    """
+    try:
+        container.remove(force=True)
+    except docker.errors.APIError as e:
+        logging.warning(f"Failed to remove pool container {container.name}: {e}")
+    remove_slot_config(config_file)
+
+
+class ContainerPool:
+    """
+    Keeps pre-created, network-attached containers per component type so
+    /start only has to write the config and start one
+    Each slot binds its own config file, written when the slot is taken
+    Slots are refilled in the background after every hit
+    """
+
+    def __init__(self, process_classes: Dict[str, type], pool_options: Dict[str, Any]):
+        self.process_classes = process_classes
+        self.specs: Dict[str, Dict[str, Any]] = {}
+        for component_type, spec in (pool_options or {}).items():
+            if component_type not in process_classes:
+                raise RuntimeError(f"Container pool does not support type {component_type}")
+            if "rf" not in spec:
+                raise RuntimeError(f"Container pool for {component_type} requires rf")
+            self.specs[component_type] = {
+                "size": int(spec.get("size", 1)),
+                "rf": spec["rf"],
+                "host_network": bool(spec.get("host_network", False)),
+                "cpus": float(spec.get("cpus", 1)),
+            }
+
+        self.slots: Dict[str, Deque[Tuple[Any, str]]] = {
+            component_type: deque() for component_type in self.specs
+        }
+        self.stats: Dict[str, Dict[str, int]] = {
+            component_type: {"hits": 0, "misses": 0, "created": 0, "failed": 0}
+            for component_type in self.specs
+        }
+        self.refilling = set()
+        self.lock = threading.Lock()
+        self.refill_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="pool_refill")
+
+    def start(self) -> None:
+        """
+        Removes slots left by a previous controller and fills every pool
+        """
+        if not self.specs:
+            return
+        os.makedirs(POOL_DIRECTORY, exist_ok=True)
+        stale = Config.docker_client.containers.list(
+            all=True, filters={"label": POOL_LABEL, "status": "created"}
+        )
+        for container in stale:
+            try:
+                container.remove(force=True)
+            except docker.errors.APIError as e:
+                logging.warning(f"Failed to remove stale pool container {container.name}: {e}")
+        for component_type in self.specs:
+            self._schedule_refill(component_type)
+
+    def acquire(
+        self,
+        component_type: str,
+        rf_config: Dict[str, Any],
+        host_network: bool = False,
+        cpus: float = 1,
+    ) -> Optional[Tuple[Any, str]]:
+        """
+        Takes a slot matching type, rf, host_network and cpus, returning
+        (container, config path) or None on a miss
+        """
+        with self.lock:
+            spec = self.specs.get(component_type)
+            if spec is None:
+                return None
+            matches = (
+                spec["rf"] == rf_config
+                and spec["host_network"] == bool(host_network)
+                and spec["cpus"] == float(cpus)
+            )
+            if not matches or not self.slots[component_type]:
+                self.stats[component_type]["misses"] += 1
+                slot = None
+            else:
+                self.stats[component_type]["hits"] += 1
+                slot = self.slots[component_type].popleft()
+        self._schedule_refill(component_type)
+        return slot
+
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        with self.lock:
+            return {
+                component_type: dict(stats, available=len(self.slots[component_type]), size=self.specs[component_type]["size"])
+                for component_type, stats in self.stats.items()
+            }
+
+    def drain(self) -> None:
+        """
+        Removes every idle slot, used on shutdown
+        """
+        self.refill_executor.shutdown(wait=False, cancel_futures=True)
+        with self.lock:
+            slots = [slot for queue in self.slots.values() for slot in queue]
+            for queue in self.slots.values():
+                queue.clear()
+        for container, config_path in slots:
+            try:
+                container.remove(force=True)
+            except docker.errors.APIError as e:
+                logging.warning(f"Failed to remove pool container {container.name}: {e}")
+            if os.path.exists(config_path):
+                os.remove(config_path)
+
+    def _schedule_refill(self, component_type: str) -> None:
+        with self.lock:
+            if component_type in self.refilling:
+                return
+            self.refilling.add(component_type)
+        try:
+            self.refill_executor.submit(self._refill, component_type)
+        except RuntimeError:
+            # Executor already shut down
+            with self.lock:
+                self.refilling.discard(component_type)
+
+    def _refill(self, component_type: str) -> None:
+        try:
+            while True:
+                with self.lock:
+                    if len(self.slots[component_type]) >= self.specs[component_type]["size"]:
+                        return
+                slot = self._create_slot(component_type)
+                with self.lock:
+                    if slot is None:
+                        self.stats[component_type]["failed"] += 1
+                        return
+                    self.stats[component_type]["created"] += 1
+                    self.slots[component_type].append(slot)
+        finally:
+            with self.lock:
+                self.refilling.discard(component_type)
+
+    def _create_slot(self, component_type: str) -> Optional[Tuple[Any, str]]:
+        slot_id = f"rt_pool_{component_type}_{uuid.uuid4().hex[:8]}"
+        config_path = os.path.join(POOL_DIRECTORY, f"{slot_id}.{config_file_extension(component_type)}")
+        # The bind source must exist or Docker creates a directory in its place
+        open(config_path, "w").close()
+
+        slot_config = {
+            "id": slot_id,
+            "type": component_type,
+            "config_file": host_path(config_path),
+            "rf": self.specs[component_type]["rf"],
+            "host_network": self.specs[component_type]["host_network"],
+            "cpus": self.specs[component_type]["cpus"],
+            "permissions": [],
+        }
+        try:
+            handle = self.process_classes[component_type](Config.influxdb_client, Config.docker_client, slot_config)
+            handle.config.create_only = True
+            handle.config.container_labels[POOL_LABEL] = component_type
+            handle.start()
+        except Exception as e:
+            logging.error(f"Failed to create pool container for {component_type}: {e}")
+            os.remove(config_path)
+            return None
+        if handle.docker_container is None:
+            os.remove(config_path)
+            return None
+        logging.debug(f"Pool container {slot_id} ready")
+        return handle.docker_container, config_path
@@ -0,0 +1,147 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from docker.client import DockerClient
+
+from log_query import parse_time
+
+HEALTH_ACTION = "health_status"
+
+
+class ContainerStatusTable:
+    """
+    In-memory status of every container by name, kept current from Docker
+    container events (start, die, oom, health_status, rename, destroy)
+    Restart counts survive container re-creation under the same name,
+    entries are only dropped through forget()
+    """
+
+    def __init__(self, docker_client: DockerClient):
+        self.docker_client = docker_client
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.lock = threading.Lock()
+
+    def refresh(self) -> None:
+        """
+        Rebuilds the table from a full container listing,
+        used at startup and after the event stream reconnects
+        """
+        for container in self.docker_client.containers.list(all=True):
+            self.update(container.attrs)
+        logging.debug(f"Container status table refreshed with {len(self.entries)} containers")
+
+    def update(self, attrs: Dict[str, Any]) -> None:
+        """
+        Records the state of one container from its inspect attributes
+        """
+        state = attrs.get("State", {})
+        name = attrs.get("Name", "").lstrip("/")
+        started_ns = None
+        if state.get("Running"):
+            try:
+                started_ns = parse_time(state.get("StartedAt", ""))
+            except ValueError:
+                started_ns = time.time_ns()
+        with self.lock:
+            entry = self._entry(name, attrs.get("Id", ""))
+            entry["container_id"] = attrs.get("Id", entry["container_id"])
+            entry["state"] = state.get("Status", "unknown")
+            if entry["state"] != "created":
+                entry["starts"] = max(entry["starts"], 1)
+            entry["exit_code"] = None if state.get("Running") else state.get("ExitCode")
+            entry["oom_killed"] = bool(state.get("OOMKilled", False))
+            entry["health"] = (state.get("Health") or {}).get("Status")
+            entry["restart_count"] = max(entry["restart_count"], int(attrs.get("RestartCount", 0)))
+            entry["started_ns"] = started_ns
+
+    def handle_event(self, event: dict) -> None:
+        action = event.get("Action", "")
+        attributes = event.get("Actor", {}).get("Attributes", {})
+        name = attributes.get("name", "")
+        if not name:
+            return
+        timestamp_ns = event.get("timeNano") or time.time_ns()
+        with self.lock:
+            if action == "rename":
+                old_name = attributes.get("oldName", "").lstrip("/")
+                if old_name in self.entries:
+                    self.entries[name] = self.entries.pop(old_name)
+                return
+            if action not in ("start", "die", "oom", "destroy") and not action.startswith(HEALTH_ACTION):
+                return
+
+            entry = self._entry(name, event.get("id", ""))
+            if action == "start":
+                if entry["container_id"] != event.get("id") or entry["started_ns"] is None:
+                    if entry["starts"] > 0:
+                        entry["restart_count"] += 1
+                    entry["starts"] += 1
+                entry.update(
+                    container_id=event.get("id", ""),
+                    state="running",
+                    exit_code=None,
+                    oom_killed=False,
+                    health=None,
+                    started_ns=timestamp_ns,
+                )
+            elif action == "die":
+                exit_code = attributes.get("exitCode")
+                entry.update(
+                    state="exited",
+                    exit_code=int(exit_code) if exit_code is not None else None,
+                    started_ns=None,
+                    finished_ns=timestamp_ns,
+                )
+            elif action == "oom":
+                entry["oom_killed"] = True
+            elif action == "destroy":
+                entry.update(state="removed", started_ns=None)
+            else:
+                entry["health"] = action.partition(": ")[2] or attributes.get(HEALTH_ACTION)
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the status of a container, None if it was never seen
+        """
+        with self.lock:
+            entry = self.entries.get(name)
+            if entry is None:
+                return None
+            entry = dict(entry)
+        uptime = None
+        if entry["started_ns"] is not None:
+            uptime = round(max(0, time.time_ns() - entry["started_ns"]) / 1e9, 3)
+        return {
+            "id": name,
+            "healthy": entry["state"] == "running" and entry["health"] != "unhealthy",
+            "state": entry["state"],
+            "exit_code": entry["exit_code"],
+            "oom_killed": entry["oom_killed"],
+            "health": entry["health"],
+            "restart_count": entry["restart_count"],
+            "uptime_s": uptime,
+            "container_id": entry["container_id"],
+        }
+
+    def forget(self, name: str) -> None:
+        with self.lock:
+            self.entries.pop(name, None)
+
+    def _entry(self, name: str, container_id: str) -> Dict[str, Any]:
+        entry = self.entries.get(name)
+        if entry is None:
+            entry = {
+                "container_id": container_id,
+                "state": "unknown",
+                "exit_code": None,
+                "oom_killed": False,
+                "health": None,
+                "restart_count": 0,
+                "starts": 0,
+                "started_ns": None,
+                "finished_ns": None,
+            }
+            self.entries[name] = entry
+        return entry
@@ -1,8 +1,16 @@
+import hmac
 import json
 import http.server
 from globals import Config, Globals
+from container_pool import config_file_extension, discard_slot, remove_slot_config
+from controller_metrics import API_REQUEST_SECONDS, METRICS
+from profiler import ALLOCATION_PROFILER, CPU_PROFILER
+from log_query import DEFAULT_LIMIT, MAX_LIMIT, LogPage, format_time, parse_time
 import logging
 import os
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
 
 from rtue_worker_thread import rtue
 from jammer_worker_thread import jammer
@@ -11,57 +19,117 @@ from decoder_worker_thread import decoder
 from llm_worker_thread import llm_worker
 from rach_worker_thread import rach_agent
 from uu_agent_worker_thread import uu_agent
+from worker_thread import WorkerThread
+
+# Paths reported individually in rt_api_request_seconds
+API_ENDPOINTS = {
+    "/list", "/pool", "/nodes", "/health", "/logs", "/logs/stream", "/metrics",
+    "/start", "/stop", "/start/batch", "/stop/batch",
+    "/profile/cpu/start", "/profile/cpu/stop", "/profile/memory/start", "/profile/memory/stop",
+}
+
+# Comment sent on idle log streams so proxies and clients keep them open
+SSE_KEEPALIVE_S = 10
 
 class SystemControlHandler(http.server.SimpleHTTPRequestHandler):
+    # Keep-alive: every response must carry a Content-Length
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes; don't let Nagle hold the body back
+    disable_nagle_algorithm = True
+
+    def parse_request(self):
+        self.request_began = time.monotonic()
+        # The request line arrived; the rest of the request may take longer
+        self.connection.settimeout(self.server.request_timeout)
+        return super().parse_request()
+
+    def send_response(self, code, message=None):
+        self.response_code = code
+        super().send_response(code, message)
+
+    def handle_one_request(self):
+        self.request_began = None
+        self.response_code = None
+        self.connection.settimeout(self.server.idle_timeout)
+        super().handle_one_request()
+        if self.request_began is not None and self.command:
+            endpoint = urllib.parse.urlparse(self.path).path
+            API_REQUEST_SECONDS.observe(
+                time.monotonic() - self.request_began,
+                method=self.command,
+                endpoint=endpoint if endpoint in API_ENDPOINTS else "other",
+                status=self.response_code,
+            )
+
     def _get_permissions(self):
-        is_valid_token = False
-        permissions = []
-        auth_header = self.headers.get("Authorization")
+        auth_header = self.headers.get("Authorization") or ""
         if not auth_header.startswith("Bearer "):
             return False, []
         token = auth_header.removeprefix("Bearer").strip()
-        for process_config in Globals.process_metadata:
-            for existing_tok in process_config["token"].keys():
-                is_valid_token = existing_tok == token
-                if is_valid_token:
-                    permissions = process_config["token"][token]
-                    break
-            if is_valid_token:
-                break
-        return is_valid_token, permissions
-
-    def _set_headers(self, code=200):
+        permissions = Globals.process_registry.permissions_for(token)
+        if permissions is None:
+            return False, []
+        return True, permissions
+
+    def _send_json(self, code, body):
+        data = json.dumps(body).encode("utf-8")
         self.send_response(code)
         self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_ndjson(self, rows, chunk_size=65536):
+        """
+        Streams an iterable of JSON objects as NDJSON with chunked encoding
+        A failure mid-stream ends the body with an error line
+        """
+        self.send_response(200)
+        self.send_header('Content-type', 'application/x-ndjson')
+        self.send_header('Transfer-Encoding', 'chunked')
         self.end_headers()
 
+        def write_chunk(data):
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+
+        buffer = bytearray()
+        try:
+            for row in rows:
+                buffer += json.dumps(row).encode("utf-8") + b"\n"
+                if len(buffer) >= chunk_size:
+                    write_chunk(bytes(buffer))
+                    buffer.clear()
+        except Exception as e:
+            logging.error(f"Streaming response failed: {e}")
+            buffer += json.dumps({"error": str(e)}).encode("utf-8") + b"\n"
+        if buffer:
+            write_chunk(bytes(buffer))
+        self.wfile.write(b"0\r\n\r\n")
+
     def _send_unauthorized(self):
-        self._set_headers(401)
-        self.wfile.write(json.dumps({"error":"Unauthorized"}).encode("utf-8"))
+        self._send_json(401, {"error":"Unauthorized"})
 
     def _send_nonexistent(self):
-        self._set_headers(404)
-        self.wfile.write(json.dumps({"error":"Endpoint not found"}).encode("utf-8"))
+        self._send_json(404, {"error":"Endpoint not found"})
 
     def get_components(self):
-        Globals.process_metadata
         is_valid_token, perms = self._get_permissions()
         if not is_valid_token:
             self._send_unauthorized()
             return
 
         response_list = []
-        for process_config in Globals.process_metadata:
+        for process_config in Globals.process_registry.snapshot():
             if process_config["type"] not in perms:
                 continue
             response_list.append({
                 "id": process_config["id"],
                 "type": process_config["type"],
                 "config_file": process_config["config"]["config_file"],
-                "permissions": process_config["config"]["permissions"]
+                "permissions": process_config["config"]["permissions"],
+                "node": process_config["config"].get("node"),
             })
-        self._set_headers()
-        self.wfile.write(json.dumps({"running": response_list}).encode("utf-8"))
+        self._send_json(200, {"running": response_list})
 
     def get_component_logs(self):
         is_valid_token, perms = self._get_permissions()
@@ -75,43 +143,50 @@ class SystemControlHandler(http.server.SimpleHTTPRequestHandler):
         try:
             payload = json.loads(post_data)
         except json.JSONDecodeError:
-            self._set_headers(403)
-            self.wfile.write(json.dumps({"error":"malformed request"}).encode("utf-8"))
+            self._send_json(403, {"error":"malformed request"})
             return
 
         if not all(k in payload for k in ("id", "type")):
-                self._set_headers(400)
-                self.wfile.write(json.dumps({"error": "Missing required fields: id, type"}).encode("utf-8"))
+                self._send_json(400, {"error": "Missing required fields: id, type"})
                 return
 
-        influx_bucket = "rtusystem"
-        influx_id = payload["id"]
-
-        query = f'''
-            from(bucket: "{influx_bucket}")
-            |> range(start: {Globals.controller_init_time})
-            |> filter(fn: (r) => r._measurement == "component_log")
-            |> filter(fn: (r) => r["id"] == "{influx_id}")
-            |> sort(columns: ["_time"])
-        '''
+        try:
+            limit = int(payload.get("limit", DEFAULT_LIMIT))
+            if not 0 < limit <= MAX_LIMIT:
+                raise ValueError(f"limit must be between 1 and {MAX_LIMIT}")
+            start_ns = parse_time(payload.get("cursor") or payload.get("since") or Globals.controller_init_time)
+            stop_ns = parse_time(payload["until"]) if payload.get("until") else None
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+            return
 
-        query_api = Config.influxdb_client.query_api()
-        result = query_api.query(org=Config.influxdb_client.org, query=query)
+        page = LogPage(
+            Config.influxdb_client,
+            "rtusystem",
+            payload["id"],
+            start_ns,
+            stop_ns,
+            limit=limit,
+            tail=bool(payload.get("tail", False)),
+        )
+        rows = iter(page)
+        try:
+            first_row = next(rows, None)
+        except Exception as e:
+            logging.error(f"Log query for {payload['id']} failed: {e}")
+            self._send_json(500, {"error": "log query failed"})
+            return
 
-        logs = []
-        for table in result:
-            for record in table.records:
-                logs.append({
-                    "time": record.get_time().isoformat(),
-                    "message": record.get_value()
-                })
+        def page_lines():
+            if first_row is not None:
+                yield first_row
+                yield from rows
+            yield {"next_cursor": page.next_cursor, "count": page.count, "complete": page.complete}
 
-        self._set_headers()
-        self.wfile.write(json.dumps({"logs":logs}).encode("utf-8"))
+        self._send_ndjson(page_lines())
 
 
     def start_component(self):
-        Globals.process_metadata
         is_valid_token, perms = self._get_permissions()
         if not is_valid_token:
             self._send_unauthorized()
@@ -123,91 +198,135 @@ class SystemControlHandler(http.server.SimpleHTTPRequestHandler):
         try:
             payload = json.loads(post_data)
         except json.JSONDecodeError:
-            self._set_headers(403)
-            self.wfile.write(json.dumps({"error":"malformed request"}).encode("utf-8"))
+            self._send_json(403, {"error":"malformed request"})
             return
 
-        logging.debug(f"{payload.keys()}")
-        if not all(k in payload for k in ("id", "type", "config_str", "rf")):
-                self._set_headers(400)
-                self.wfile.write(json.dumps({"error": "Missing required fields: id, type, config_str, rf"}).encode("utf-8"))
-                return
+        self._send_json(*self._start(payload))
+
+    def _start(self, payload):
+        """
+        Validates and starts one component, returning (status code, body)
+        """
+        if not isinstance(payload, dict) or not all(k in payload for k in ("id", "type", "config_str", "rf")):
+            return 400, {"error": "Missing required fields: id, type, config_str, rf"}
 
         rf_type = payload.get("rf").get("type", None)
         if not rf_type:
-                self._set_headers(400)
-                self.wfile.write(json.dumps({"error": "Missing required fields for rf: type"}).encode("utf-8"))
-                return
+            return 400, {"error": "Missing required fields for rf: type"}
 
         rf_keys = ("images_dir", "type")
         if rf_type == "zmq":
             rf_keys = ("tcp_subnet", "gateway")
 
         if not all(k in payload["rf"] for k in rf_keys):
-                self._set_headers(400)
-                self.wfile.write(json.dumps({"error": "Missing required fields for rf: type, images_dir"}).encode("utf-8"))
-                return
-
-        if any(p["id"] == payload["id"] for p in Globals.process_metadata):
-                self._set_headers(409)
-                self.wfile.write(json.dumps({"error": "ID conflict with existing component"}).encode("utf-8"))
-                return
+            return 400, {"error": "Missing required fields for rf: type, images_dir"}
 
-        if not os.path.isdir("/host/.generated/"):
-            os.makedirs("/host/.generated", exist_ok=True)
-
-        file_ext = {
-            "rtue": "conf",
-            "sniffer": "toml"
-        }.get(payload["type"], "yaml")
-
-        config_file = f"/host/.generated/{payload['id']}.{file_ext}"
+        if not Globals.process_registry.reserve(payload["id"]):
+            return 409, {"error": "ID conflict with existing component"}
+        try:
+            return self._start_reserved_component(payload)
+        finally:
+            Globals.process_registry.release(payload["id"])
+            Config.cluster.settle([payload["id"]])
+
+    def _start_reserved_component(self, payload):
+        """
+        Starts a validated /start payload whose id is reserved in the registry
+        """
+        # Resolved before anything is placed or written, so a bad type leaves nothing behind
+        process_class = globals().get(payload["type"])
+        if not (isinstance(process_class, type) and issubclass(process_class, WorkerThread)):
+            return 403, {"error":f"Invalid process type {payload['type']}"}
+
+        placement = {"id": payload["id"], "type": payload["type"], "rf": payload["rf"]}
+        for key in ("node", "cpus", "host_network"):
+            if key in payload:
+                placement[key] = payload[key]
+        try:
+            node = Config.cluster.place(placement)
+        except RuntimeError as e:
+            return 503, {"error": str(e)}
+
+        pooled_container = None
+        pooled_slot = None
+        # Pool slots are created on the default node
+        if Config.container_pool and node is Config.cluster.default:
+            pooled_slot = Config.container_pool.acquire(
+                payload["type"],
+                payload["rf"],
+                host_network=payload.get("host_network", False),
+                cpus=payload.get("cpus", 1),
+            )
 
         try:
-            with open(config_file, "w") as f:
-                f.write(payload["config_str"])
+            if pooled_slot:
+                # Pool slots bind their own file at creation, so the config goes there
+                pooled_container, config_file = pooled_slot
+                with open(config_file, "w") as f:
+                    f.write(payload["config_str"])
+            else:
+                config_file = Config.config_store.put(
+                    payload["id"], payload["config_str"], config_file_extension(payload["type"])
+                )
         except IOError as e:
-            self._set_headers(500)
-            self.wfile.write(json.dumps({"error":f"Failed to write config to file {config_file}"}))
-            return
+            if pooled_slot:
+                discard_slot(*pooled_slot)
+            return 500, {"error":f"Failed to write config for {payload['id']}: {e}"}
 
         # NOTE: config path must be translated to the host path
         config_file = config_file.replace("/host", os.getenv("DOCKER_SYSTEM_DIRECTORY"))
         logging.debug(f"Starting component with filename on host {config_file}")
 
-        process_class = None
-        try:
-            process_class = globals()[payload["type"]]
-        except KeyError:
-            self._set_headers(403)
-            self.wfile.write(json.dumps({"error":f"Invalid process type {payload['type']}"}).encode("utf-8"))
-            return
-
         new_process_config = {
             "config_file": config_file,
             "id": payload["id"],
             "type": payload["type"],
             "rf": payload["rf"],
             "permissions": [],
+            "node": node.name,
         }
+        for key in ("cpus", "host_network"):
+            if key in payload:
+                new_process_config[key] = payload[key]
+        if "readiness" in payload:
+            new_process_config["readiness"] = payload["readiness"]
 
-        process_handle = process_class(Config.influxdb_client, Config.docker_client, new_process_config)
-
-
-        Globals.process_metadata.append({
+        try:
+            process_handle = process_class(Config.influxdb_client, Config.docker_client, new_process_config)
+        except RuntimeError as e:
+            Config.config_store.release(payload["id"])
+            if pooled_container:
+                discard_slot(pooled_container, config_file)
+            return 400, {"error": str(e)}
+
+        Globals.process_registry.add({
             'id': payload['id'],
             'type': payload['type'],
             'config': new_process_config,
             'handle': process_handle,
-            'token': {None: []}
+            'token': {None: []},
+            'source': 'api',
         })
-        process_handle.start()
-
-        self._set_headers()
-        self.wfile.write(json.dumps({"msg":f"process started: {payload['id']}"}).encode("utf-8"))
+        try:
+            if pooled_container:
+                logging.debug(f"Starting {payload['id']} from pool container {pooled_container.name}")
+                process_handle.start_pooled(pooled_container)
+            else:
+                process_handle.start()
+        except Exception as e:
+            logging.error(f"Failed to start {payload['id']}: {e}")
+            Globals.process_registry.remove(payload["id"])
+            Config.config_store.release(payload["id"])
+            if pooled_container:
+                discard_slot(pooled_container, config_file)
+            return 500, {"error": f"Failed to start {payload['id']}: {e}"}
+
+        if payload.get("wait_ready", False) and not process_handle.wait_ready():
+            return 504, {"error": f"process not ready: {payload['id']}", "pending": process_handle.readiness.pending()}
+
+        return 200, {"msg":f"process started: {payload['id']}"}
 
     def stop_component(self):
-        Globals.process_metadata
         is_valid_token, perms = self._get_permissions()
         if not is_valid_token:
             self._send_unauthorized()
@@ -223,24 +342,95 @@ class SystemControlHandler(http.server.SimpleHTTPRequestHandler):
             return
 
         if "id" not in payload.keys():
-            self._set_headers(400)
-            self.wfile.write(json.dumps({"error":"Missing required field id"}).encode("utf-8"))
+            self._send_json(400, {"error":"Missing required field id"})
             return
 
-        for i, process_config in enumerate(Globals.process_metadata):
-            if process_config["id"] == payload["id"]:
-                if process_config["type"] not in perms:
-                    continue
-                process_config["handle"].stop()
-                self._set_headers()
-                self.wfile.write(json.dumps({"id":process_config["id"]}).encode("utf-8"))
-                del Globals.process_metadata[i]
-                return
-        self._set_headers(404)
-        self.wfile.write(json.dumps({"error":"Component with ID does not exist"}).encode("utf-8"))
+        self._send_json(*self._stop(payload["id"], perms))
+
+    def _stop(self, component_id, perms):
+        """
+        Stops one component, returning (status code, body)
+        """
+        process_config = Globals.process_registry.get(component_id)
+        if process_config is None or process_config["type"] not in perms:
+            return 404, {"error":"Component with ID does not exist"}
+        if Globals.process_registry.remove(component_id) is None:
+            # Stopped by a concurrent request
+            return 404, {"error":"Component with ID does not exist"}
+        process_config["handle"].stop()
+        Config.config_store.release(component_id)
+        remove_slot_config(process_config["config"].get("config_file", ""))
+        container_status = process_config["handle"].config.container_status
+        if container_status:
+            container_status.forget(component_id)
+        return 200, {"id":component_id}
+
+    def start_components(self):
+        """
+        POST /start/batch {"components": [<start payload>, ...]}
+        """
+        is_valid_token, perms = self._get_permissions()
+        if not is_valid_token:
+            self._send_unauthorized()
+            return
+
+        payload = self._read_payload()
+        if not isinstance(payload, dict) or not isinstance(payload.get("components"), list):
+            self._send_json(400, {"error": "Missing required field components"})
+            return
+
+        results = self._run_batch(self._start, payload["components"])
+        for component, result in zip(payload["components"], results):
+            result["id"] = component.get("id") if isinstance(component, dict) else None
+        self._send_json(200, {"results": results})
+
+    def stop_components(self):
+        """
+        POST /stop/batch {"ids": [<id>, ...]}
+        """
+        is_valid_token, perms = self._get_permissions()
+        if not is_valid_token:
+            self._send_unauthorized()
+            return
+
+        payload = self._read_payload()
+        if not isinstance(payload, dict) or not isinstance(payload.get("ids"), list):
+            self._send_json(400, {"error": "Missing required field ids"})
+            return
+
+        results = self._run_batch(lambda component_id: self._stop(component_id, perms), payload["ids"])
+        for component_id, result in zip(payload["ids"], results):
+            result["id"] = component_id
+        self._send_json(200, {"results": results})
+
+    def _read_payload(self):
+        content_length = int(self.headers.get('Content-Length', 0))
+        try:
+            return json.loads(self.rfile.read(content_length))
+        except json.JSONDecodeError:
+            return None
+
+    def _run_batch(self, operation, items):
+        """
+        Runs operation(item) -> (status code, body) for every item with at most
+        bulk_concurrency running at once; results keep the order of items
+        """
+        if not items:
+            return []
+
+        def run(item):
+            try:
+                code, body = operation(item)
+            except Exception as e:
+                logging.error(f"Batch item failed: {e}")
+                code, body = 500, {"error": str(e)}
+            return dict(body, status=code)
+
+        max_workers = min(len(items), max(1, int((Config.options or {}).get("bulk_concurrency", 8))))
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="control_batch") as executor:
+            return list(executor.map(run, items))
 
     def check_component_health(self):
-        Globals.process_metadata
         is_valid_token, perms = self._get_permissions()
         if not is_valid_token:
             self._send_unauthorized()
@@ -255,30 +445,236 @@ class SystemControlHandler(http.server.SimpleHTTPRequestHandler):
             self._send_unauthorized()
             return
 
+        if "ids" in payload.keys() or payload.get("all", False):
+            self._send_json(200, self._bulk_health(perms, payload.get("ids")))
+            return
+
         if "id" not in payload.keys():
-            self._set_headers(400)
-            self.wfile.write(json.dumps({"error":"Missing required field id"}).encode("utf-8"))
+            self._send_json(400, {"error":"Missing required field id, ids or all"})
             return
 
-        for i, process_config in enumerate(Globals.process_metadata):
-            if process_config["id"] == payload["id"]:
-                if process_config["type"] not in perms:
-                    continue
-                self._set_headers()
-                self.wfile.write(json.dumps(process_config["handle"].get_status()).encode("utf-8"))
-                return
-        self._set_headers(404)
-        self.wfile.write(json.dumps({"error":"Component with ID does not exist"}).encode("utf-8"))
+        process_config = Globals.process_registry.get(payload["id"])
+        if process_config is None or process_config["type"] not in perms:
+            self._send_json(404, {"error":"Component with ID does not exist"})
+            return
+        self._send_json(200, process_config["handle"].get_status())
+
+    def get_all_health(self):
+        is_valid_token, perms = self._get_permissions()
+        if not is_valid_token:
+            self._send_unauthorized()
+            return
+        self._send_json(200, self._bulk_health(perms))
+
+    def _bulk_health(self, perms, component_ids=None):
+        """
+        Status of the given components, or of every permitted one
+        Unknown or forbidden ids are listed under missing
+        """
+        if component_ids is None:
+            process_configs = Globals.process_registry.snapshot()
+            missing = []
+        else:
+            process_configs = []
+            missing = []
+            for component_id in component_ids:
+                process_config = Globals.process_registry.get(component_id)
+                if process_config is None or process_config["type"] not in perms:
+                    missing.append(component_id)
+                else:
+                    process_configs.append(process_config)
+
+        components = [
+            process_config["handle"].get_status()
+            for process_config in process_configs
+            if process_config["type"] in perms and hasattr(process_config["handle"], "get_status")
+        ]
+        return {"components": components, "missing": missing}
+
+
+    def stream_component_logs(self):
+        """
+        Server-Sent Events tail of a component's in-memory log buffer
+        GET /logs/stream?id=<id>&history=<lines>; each event id is the line's
+        sequence number, so a reconnect with Last-Event-ID resumes without gaps
+        as long as the missed lines are still buffered
+        """
+        is_valid_token, perms = self._get_permissions()
+        if not is_valid_token:
+            self._send_unauthorized()
+            return
 
+        query = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+        component_id = query.get("id", [""])[0]
+        process_config = Globals.process_registry.get(component_id)
+        if process_config is None or process_config["type"] not in perms:
+            self._send_json(404, {"error":"Component with ID does not exist"})
+            return
+        log_buffer = getattr(process_config["handle"], "log_buffer", None)
+        if log_buffer is None:
+            self._send_json(404, {"error":"Component with ID does not exist"})
+            return
+
+        try:
+            history = int(query.get("history", [DEFAULT_LIMIT])[0])
+            last_seq = int(self.headers.get("Last-Event-ID", -1))
+        except ValueError:
+            self._send_json(400, {"error": "history and Last-Event-ID must be integers"})
+            return
+
+        if not self.server.log_streams.acquire(blocking=False):
+            self._send_json(503, {"error": "too many log streams"})
+            return
+        try:
+            self._stream_log_buffer(component_id, log_buffer, history, last_seq)
+        finally:
+            self.server.log_streams.release()
+
+    def _stream_log_buffer(self, component_id, log_buffer, history, last_seq):
+        """
+        Writes the event stream until the client leaves or the buffer is closed
+        """
+        self.send_response(200)
+        self.send_header('Content-type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+
+        entries = log_buffer.read(last_seq, None if last_seq >= 0 else history)
+        try:
+            while True:
+                events = b"".join(
+                    f"id: {seq}\nevent: log\ndata: {json.dumps({'time': format_time(timestamp_ns), 'message': line})}\n\n".encode("utf-8")
+                    for seq, timestamp_ns, line in entries
+                )
+                self.wfile.write(events or b": keepalive\n\n")
+                if entries:
+                    last_seq = entries[-1][0]
+                if log_buffer.closed:
+                    self.wfile.write(b"event: end\ndata: {}\n\n")
+                    return
+                entries = log_buffer.wait(last_seq, SSE_KEEPALIVE_S)
+        except (BrokenPipeError, ConnectionResetError, TimeoutError):
+            logging.debug(f"Log stream client for {component_id} disconnected")
+
+    def get_metrics(self):
+        is_valid_token, perms = self._get_permissions()
+        if not is_valid_token:
+            self._send_unauthorized()
+            return
+
+        data = METRICS.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header('Content-type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _check_profiling_token(self):
+        """
+        Profiling is only enabled by a profiling_token in the controller config
+        """
+        expected = (Config.options or {}).get("profiling_token")
+        auth_header = self.headers.get("Authorization") or ""
+        token = auth_header.removeprefix("Bearer").strip()
+        return bool(expected) and auth_header.startswith("Bearer ") and hmac.compare_digest(token, str(expected))
+
+    def profile(self):
+        """
+        POST /profile/cpu/start {interval_ms, duration_s}, /profile/cpu/stop
+        POST /profile/memory/start {frames, duration_s, top}, /profile/memory/stop {top}
+        CPU profiles are returned as collapsed stacks, memory profiles as JSON
+        """
+        if not self._check_profiling_token():
+            self._send_unauthorized()
+            return
+
+        payload = self._read_payload() or {}
+        if not isinstance(payload, dict):
+            self._send_json(400, {"error": "malformed request"})
+            return
+
+        path = urllib.parse.urlparse(self.path).path
+        try:
+            if path == "/profile/cpu/start":
+                if not CPU_PROFILER.start(payload.get("interval_ms", 10), payload.get("duration_s")):
+                    self._send_json(409, {"error": "CPU profile already running"})
+                    return
+                self._send_json(200, {"msg": "CPU profile started"})
+            elif path == "/profile/cpu/stop":
+                result = CPU_PROFILER.stop()
+                if result is None:
+                    self._send_json(404, {"error": "No CPU profile taken"})
+                    return
+                data = result.encode("utf-8")
+                self.send_response(200)
+                self.send_header('Content-type', 'text/plain')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            elif path == "/profile/memory/start":
+                if not ALLOCATION_PROFILER.start(
+                    payload.get("frames", 25), payload.get("duration_s"), payload.get("top", 25)
+                ):
+                    self._send_json(409, {"error": "Allocation trace already running"})
+                    return
+                self._send_json(200, {"msg": "Allocation trace started"})
+            elif path == "/profile/memory/stop":
+                result = ALLOCATION_PROFILER.stop(payload.get("top"))
+                if result is None:
+                    self._send_json(404, {"error": "No allocation trace taken"})
+                    return
+                self._send_json(200, result)
+            else:
+                self._send_nonexistent()
+        except (TypeError, ValueError) as e:
+            self._send_json(400, {"error": str(e)})
+
+    def get_nodes(self):
+        """
+        GET /nodes: declared capacity and current use of every Docker node
+        """
+        is_valid_token, perms = self._get_permissions()
+        if not is_valid_token:
+            self._send_unauthorized()
+            return
+
+        self._send_json(200, {"nodes": Config.cluster.get_stats()})
+
+    def get_pool_stats(self):
+        is_valid_token, perms = self._get_permissions()
+        if not is_valid_token:
+            self._send_unauthorized()
+            return
+
+        stats = Config.container_pool.get_stats() if Config.container_pool else {}
+        self._send_json(200, {"pool": stats, "config_store": Config.config_store.get_stats()})
 
     def do_GET(self):
-        if self.path.startswith("/list"):
+        if self.path.startswith("/logs/stream"):
+            self.stream_component_logs()
+        elif self.path.startswith("/health"):
+            self.get_all_health()
+        elif self.path.startswith("/list"):
             self.get_components()
+        elif self.path.startswith("/metrics"):
+            self.get_metrics()
+        elif self.path.startswith("/pool"):
+            self.get_pool_stats()
+        elif self.path.startswith("/nodes"):
+            self.get_nodes()
         else:
             self._send_nonexistent()
 
     def do_POST(self):
-        if self.path.startswith("/start"):
+        if self.path.startswith("/profile/"):
+            self.profile()
+        elif self.path.startswith("/start/batch"):
+            self.start_components()
+        elif self.path.startswith("/stop/batch"):
+            self.stop_components()
+        elif self.path.startswith("/start"):
             self.start_component()
         elif self.path.startswith("/stop"):
             self.stop_component()
@@ -0,0 +1,86 @@
+import http.server
+import logging
+import socket
+import ssl
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ControlServer(http.server.HTTPServer):
+    """
+    HTTPS control API server handling connections on a bounded thread pool
+    The TLS handshake runs on the worker thread so a slow client cannot stall
+    accept()
+    A kept-alive connection waiting for its next request is closed after
+    idle_timeout; the handshake and a request in progress get request_timeout
+    Log streams hold their worker for as long as the client follows, so at most
+    max_log_streams run at once and the rest of the pool stays free
+    """
+
+    def __init__(
+        self,
+        server_address,
+        handler_class,
+        ssl_context: ssl.SSLContext,
+        max_workers: int = 64,
+        request_timeout: float = 15.0,
+        idle_timeout: float = 5.0,
+        max_log_streams: int = 16,
+    ):
+        super().__init__(server_address, handler_class)
+        self.ssl_context = ssl_context
+        self.request_timeout = request_timeout
+        self.idle_timeout = idle_timeout
+        self.executor = ThreadPoolExecutor(
+            max_workers=max(1, int(max_workers)), thread_name_prefix="control_api"
+        )
+        self.log_streams = threading.BoundedSemaphore(max(1, int(max_log_streams)))
+        self.connections = set()
+        self.connections_lock = threading.Lock()
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self._process_request_worker, request, client_address)
+
+    def _process_request_worker(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def finish_request(self, request, client_address):
+        request.settimeout(self.request_timeout)
+        try:
+            tls_request = self.ssl_context.wrap_socket(request, server_side=True)
+        except (ssl.SSLError, OSError) as e:
+            logging.debug(f"TLS handshake with {client_address[0]} failed: {e}")
+            return
+        with self.connections_lock:
+            self.connections.add(tls_request)
+        try:
+            self.RequestHandlerClass(tls_request, client_address, self)
+        finally:
+            with self.connections_lock:
+                self.connections.discard(tls_request)
+            try:
+                tls_request.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            tls_request.close()
+
+    def close_connections(self):
+        """
+        Ends idle keep-alive and streaming connections so their workers exit
+        """
+        with self.connections_lock:
+            connections = list(self.connections)
+        for connection in connections:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=False, cancel_futures=True)
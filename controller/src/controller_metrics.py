@@ -0,0 +1,229 @@
+import bisect
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from influxdb_client import Point, WritePrecision
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(label_key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = label_key + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self.values: Dict[LabelKey, float] = {}
+        self.lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = _label_key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self) -> List[Tuple[str, LabelKey, Dict[str, float]]]:
+        with self.lock:
+            return [(self.name, key, {"value": value}) for key, value in self.values.items()]
+
+
+class Gauge:
+    """
+    Value read from a callback at collection time; the callback returns a
+    number or a list of (labels, value) pairs
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, callback: Callable[[], Any]):
+        self.name = name
+        self.help_text = help_text
+        self.callback = callback
+
+    def samples(self) -> List[Tuple[str, LabelKey, Dict[str, float]]]:
+        try:
+            result = self.callback()
+        except Exception as e:
+            logging.debug(f"Metric {self.name} unavailable: {e}")
+            return []
+        if isinstance(result, (int, float)):
+            return [(self.name, (), {"value": result})]
+        return [(self.name, _label_key(labels), {"value": value}) for labels, value in result]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [bucket counts (non-cumulative, last one is +Inf), sum, count]
+        self.values: Dict[LabelKey, list] = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            entry = self.values.get(key)
+            if entry is None:
+                entry = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self.values[key] = entry
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def samples(self) -> List[Tuple[str, LabelKey, Dict[str, float]]]:
+        with self.lock:
+            snapshot = {key: (list(counts), total, count) for key, (counts, total, count) in self.values.items()}
+        samples = []
+        for key, (counts, total, count) in snapshot.items():
+            fields: Dict[str, float] = {"count": count, "sum": total}
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                fields[f"le_{_format_value(bound)}"] = cumulative
+            samples.append((self.name, key, fields))
+        return samples
+
+
+class MetricsRegistry:
+    """
+    Controller self-metrics, rendered in the Prometheus text format for /metrics
+    and as controller_metric points for InfluxDB
+    """
+
+    def __init__(self):
+        self.metrics: Dict[str, Any] = {}
+        self.lock = threading.Lock()
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._register(Counter(name, help_text))
+
+    def histogram(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, buckets))
+
+    def gauge(self, name: str, help_text: str, callback: Callable[[], Any]) -> Gauge:
+        return self._register(Gauge(name, help_text, callback))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics():
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, key, fields in metric.samples():
+                if metric.kind != "histogram":
+                    lines.append(f"{name}{_format_labels(key)} {_format_value(fields['value'])}")
+                    continue
+                for field, value in fields.items():
+                    if field.startswith("le_"):
+                        lines.append(f"{name}_bucket{_format_labels(key, (('le', field[3:]),))} {value}")
+                lines.append(f"{name}_sum{_format_labels(key)} {_format_value(fields['sum'])}")
+                lines.append(f"{name}_count{_format_labels(key)} {fields['count']}")
+        return "\n".join(lines) + "\n"
+
+    def to_line_protocol(self, timestamp_ns: int) -> List[str]:
+        records = []
+        for metric in self._metrics():
+            for name, key, fields in metric.samples():
+                point = Point("controller_metric").tag("metric", name)
+                for label, value in key:
+                    point = point.tag(label, value)
+                for field, value in fields.items():
+                    point = point.field(field, float(value))
+                records.append(point.time(timestamp_ns, WritePrecision.NS).to_line_protocol())
+        return records
+
+    def _register(self, metric):
+        with self.lock:
+            if metric.name in self.metrics:
+                raise RuntimeError(f"Metric {metric.name} already registered")
+            self.metrics[metric.name] = metric
+        return metric
+
+    def _metrics(self) -> list:
+        with self.lock:
+            return list(self.metrics.values())
+
+
+class MetricsReporter:
+    """
+    Mirrors the registry into InfluxDB through the log writer every interval
+    """
+
+    def __init__(self, registry: MetricsRegistry, log_writer, interval_ms: int = 10000):
+        self.registry = registry
+        self.log_writer = log_writer
+        self.interval = max(1, int(interval_ms)) / 1000.0
+        self.stop_event = threading.Event()
+        self.reporter_thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self.reporter_thread = threading.Thread(target=self._report_loop, name="metrics_reporter", daemon=True)
+        self.reporter_thread.start()
+
+    def stop(self) -> None:
+        self.stop_event.set()
+
+    def _report_loop(self) -> None:
+        while not self.stop_event.wait(self.interval):
+            for record in self.registry.to_line_protocol(time.time_ns()):
+                self.log_writer.submit("controller", record)
+
+
+def docker_api_endpoint(path: str) -> str:
+    """
+    Reduces a Docker API path to a low-cardinality label:
+    /v1.44/containers/<id>/json -> containers/{id}/json
+    """
+    segments = [segment for segment in path.split("?", 1)[0].split("/") if segment]
+    if segments and segments[0].startswith("v1."):
+        segments = segments[1:]
+    if len(segments) >= 3:
+        segments = [segments[0], "{id}", segments[-1]]
+    return "/".join(segments)
+
+
+def observe_docker_response(response, *args, **kwargs):
+    """
+    requests response hook timing every Docker API call up to its response headers
+    """
+    DOCKER_API_SECONDS.observe(
+        response.elapsed.total_seconds(),
+        method=response.request.method,
+        endpoint=docker_api_endpoint(response.request.path_url),
+    )
+
+
+METRICS = MetricsRegistry()
+
+LOG_LINES = METRICS.counter("rt_log_lines_total", "Log lines read per component")
+INFLUX_WRITE_SECONDS = METRICS.histogram("rt_influx_write_seconds", "InfluxDB batch write latency")
+INFLUX_WRITE_RECORDS = METRICS.counter("rt_influx_write_records_total", "Records written to InfluxDB by outcome")
+API_REQUEST_SECONDS = METRICS.histogram("rt_api_request_seconds", "Control API handler latency")
+DOCKER_API_SECONDS = METRICS.histogram("rt_docker_api_seconds", "Docker API call latency")
@@ -0,0 +1,84 @@
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from docker.client import DockerClient
+
+
+class DockerEventListener:
+    """
+    Follows the Docker daemon event stream from one background thread
+    and dispatches each event to the handlers subscribed to its Type
+    Resync callbacks run after (re)connecting, since events may have been missed
+    """
+
+    def __init__(self, docker_client: DockerClient, reconnect_delay_ms: int = 1000):
+        self.docker_client = docker_client
+        self.reconnect_delay = max(0, int(reconnect_delay_ms)) / 1000.0
+        self.handlers: Dict[str, List[Callable[[dict], None]]] = {}
+        self.resync_handlers: List[Callable[[], None]] = []
+        self.handlers_lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.event_stream = None
+        self.listener_thread: Optional[threading.Thread] = None
+
+    def subscribe(
+        self,
+        event_type: str,
+        handler: Callable[[dict], None],
+        resync: Optional[Callable[[], None]] = None,
+    ) -> None:
+        with self.handlers_lock:
+            self.handlers.setdefault(event_type, []).append(handler)
+            if resync:
+                self.resync_handlers.append(resync)
+
+    def start(self) -> None:
+        if self.listener_thread and self.listener_thread.is_alive():
+            return
+        self.stop_event.clear()
+        self.listener_thread = threading.Thread(
+            target=self._listen, name="docker_events", daemon=True
+        )
+        self.listener_thread.start()
+
+    def stop(self) -> None:
+        self.stop_event.set()
+        if self.event_stream:
+            self.event_stream.close()
+
+    def _resync(self) -> None:
+        with self.handlers_lock:
+            resync_handlers = list(self.resync_handlers)
+        for resync in resync_handlers:
+            try:
+                resync()
+            except Exception as e:
+                logging.error(f"Docker event resync failed with error: {e}")
+
+    def _dispatch(self, event: dict) -> None:
+        with self.handlers_lock:
+            handlers = list(self.handlers.get(event.get("Type"), []))
+        for handler in handlers:
+            try:
+                handler(event)
+            except Exception as e:
+                logging.error(f"Docker event handler failed with error: {e}")
+
+    def _listen(self) -> None:
+        since = None
+        while not self.stop_event.is_set():
+            try:
+                self.event_stream = self.docker_client.events(decode=True, since=since)
+                if since is not None:
+                    self._resync()
+                for event in self.event_stream:
+                    since = event.get("time", since)
+                    self._dispatch(event)
+            except Exception as e:
+                if self.stop_event.is_set():
+                    break
+                logging.warning(f"Docker event stream lost: {e}. Reconnecting...")
+            since = since or int(time.time())
+            self.stop_event.wait(self.reconnect_delay)
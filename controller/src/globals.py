@@ -3,14 +3,33 @@ import logging
 from typing import List, Dict, Union, Optional, Any
 from influxdb_client import InfluxDBClient, WriteApi
 
+from process_registry import ProcessRegistry
+
 
 class Config:
     filename : str = ""
     options : Optional[Dict[str,Any]] = None
     log_level : int = logging.DEBUG
     docker_client = None
+    cluster = None
+    docker_events = None
+    container_status = None
+    supervisor = None
+    reconciler = None
+    metrics_reporter = None
+    control_server = None
+    image_index = None
+    network_manager = None
+    config_index = None
+    config_store = None
+    state_store = None
     influxdb_client : InfluxDBClient = None
+    log_writer = None
+    log_multiplexer = None
+    log_schema : str = "compact"
+    container_pool = None
 
 class Globals:
-    process_metadata: List[Dict[str, Any]] = []
+    process_registry : ProcessRegistry = ProcessRegistry()
     controller_init_time : str = ""
+    shutting_down : bool = False
@@ -0,0 +1,81 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Set
+
+import docker
+from docker.client import DockerClient
+
+# Events that may add a tag; everything else that touches tags forces a rebuild
+ADD_ACTIONS = ("pull", "tag", "load", "import")
+REMOVE_ACTIONS = ("untag", "delete")
+
+
+def image_repository(image_tag: str) -> str:
+    """
+    Strips the tag from an image reference, keeping registry ports intact
+    """
+    repository, _, tag = image_tag.rpartition(":")
+    if not repository or "/" in tag:
+        return image_tag
+    return repository
+
+
+class ImageIndex:
+    """
+    In-memory set of local image references for O(1) presence checks
+    Built once from images.list() and kept current from Docker image events
+    """
+
+    def __init__(self, docker_client: DockerClient):
+        self.docker_client = docker_client
+        self.references: Set[str] = set()
+        self.lock = threading.Lock()
+
+    def refresh(self) -> None:
+        references = set()
+        for img in self.docker_client.images.list():
+            for image_tag in img.tags:
+                references.add(image_tag)
+                references.add(image_repository(image_tag))
+        with self.lock:
+            self.references = references
+        logging.debug(f"Image index built with {len(references)} references")
+
+    def contains(self, image_name: str) -> bool:
+        with self.lock:
+            return image_name in self.references
+
+    def handle_event(self, event: dict) -> None:
+        action = event.get("Action", "")
+        name = event.get("Actor", {}).get("Attributes", {}).get("name", "")
+        if action in ADD_ACTIONS and name and ":" in name.rsplit("/", 1)[-1]:
+            with self.lock:
+                self.references.add(name)
+                self.references.add(image_repository(name))
+            logging.debug(f"Image index: added {name}")
+        elif action in ADD_ACTIONS or action in REMOVE_ACTIONS:
+            # Untag/delete events do not say which tags remain
+            self.refresh()
+
+    def verify(self, image_names: Iterable[str], max_workers: int = 8) -> List[str]:
+        """
+        Checks every image name in parallel and returns the missing ones
+        Index misses are confirmed against the daemon before being reported
+        """
+        missing = [name for name in set(image_names) if not self.contains(name)]
+        if not missing:
+            return []
+
+        def confirm(image_name):
+            try:
+                self.docker_client.images.get(image_name)
+            except docker.errors.ImageNotFound:
+                return image_name
+            with self.lock:
+                self.references.add(image_name)
+            return None
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(confirm, missing)
+        return sorted(name for name in results if name)
@@ -4,18 +4,17 @@ import os
 from docker.types import DeviceRequest
 
 class llm_worker(WorkerThread):
+    image_name = "ghcr.io/oran-testing/llm_worker"
+
     def __init__(self, influxdb_client, docker_client, process_config):
         super().__init__(influxdb_client, docker_client, process_config)
         self.access_token = secrets.token_urlsafe(32)
 
-    def start(self):
+    def prepare(self):
         results_dir = self.config.process_config.get("results_dir", None)
         if not results_dir:
             raise RuntimeError("Failed to start llm_worker: required field results_dir is missing")
 
-        self.config.image_name = "ghcr.io/oran-testing/llm_worker"
-        self.cleanup_old_containers()
-
         self.config.container_env = {
             "CONFIG": self.config.config_file,
             "CONTROL_IP": os.getenv("DOCKER_CONTROLLER_API_IP"),
@@ -27,7 +26,8 @@ class llm_worker(WorkerThread):
         }
         self.setup_env()
         self.setup_networks()
-        self.config.container_networks.append(self.config.docker_client.networks.get("rt_control"))
+        self.config.network_manager.get("rt_control")
+        self.config.container_networks.append("rt_control")
 
         self.config.container_volumes[self.config.config_file] = {"bind": "/llm.yaml", "mode": "ro"}
         self.config.container_volumes[f"{os.getenv('DOCKER_SYSTEM_DIRECTORY')}/.llm_worker_cache"] = {"bind": "/app/huggingface_cache", "mode": "rw"}
@@ -42,8 +42,9 @@ class llm_worker(WorkerThread):
             )
         )
 
-        self.start_container()
-
     def get_token(self):
         return self.access_token
 
+    def set_token(self, access_token):
+        self.access_token = access_token
+
@@ -0,0 +1,66 @@
+import threading
+from collections import deque
+from itertools import islice
+from typing import Deque, List, Optional, Tuple
+
+DEFAULT_CAPACITY = 1000
+
+# (seq, timestamp_ns, line); seq counts every line the buffer has seen
+LogEntry = Tuple[int, int, str]
+
+
+class LogRingBuffer:
+    """
+    The most recent log lines of one component, kept in memory for live tails
+    Readers block in wait() until a line newer than the one they last saw arrives
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.lines: Deque[LogEntry] = deque(maxlen=max(1, int(capacity)))
+        self.next_seq = 0
+        self.closed = False
+        self.condition = threading.Condition()
+
+    def append(self, timestamp_ns: int, line: str) -> None:
+        with self.condition:
+            self.lines.append((self.next_seq, timestamp_ns, line))
+            self.next_seq += 1
+            self.condition.notify_all()
+
+    def read(self, after_seq: int = -1, limit: Optional[int] = None) -> List[LogEntry]:
+        """
+        Returns buffered lines with seq > after_seq, oldest first
+        With a limit, only the newest limit of those lines
+        """
+        with self.condition:
+            return self._read(after_seq, limit)
+
+    def wait(self, after_seq: int, timeout: float) -> List[LogEntry]:
+        """
+        Blocks until a line with seq > after_seq exists, the buffer closes
+        or the timeout expires, then returns the new lines
+        """
+        with self.condition:
+            self.condition.wait_for(
+                lambda: self.closed or self.next_seq - 1 > after_seq, timeout
+            )
+            return self._read(after_seq, None)
+
+    def open(self) -> None:
+        with self.condition:
+            self.closed = False
+
+    def close(self) -> None:
+        """
+        Wakes every waiting reader; called when the component stops
+        """
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def _read(self, after_seq: int, limit: Optional[int]) -> List[LogEntry]:
+        first_seq = self.next_seq - len(self.lines)
+        start = max(0, after_seq + 1 - first_seq)
+        if limit is not None:
+            start = max(start, len(self.lines) - limit)
+        return list(islice(self.lines, start, None))
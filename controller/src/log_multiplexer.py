@@ -0,0 +1,254 @@
+import asyncio
+import logging
+import struct
+import threading
+import time
+from typing import Callable, Dict, Optional
+from urllib.parse import urlencode, urlparse
+
+from log_query import parse_docker_timestamp
+
+STREAM_HEADER_SIZE = 8
+READ_SIZE = 65536
+
+
+class LogStreamError(Exception):
+    pass
+
+
+class LogMultiplexer:
+    """
+    Follows the logs of every component container from a single asyncio loop
+    Each container log is read straight from the Docker API socket,
+    so the loop only wakes when a container writes output
+    Lines carry Docker's own nanosecond timestamps, which are also used to
+    reopen lost streams with since= while the container is running
+    """
+
+    def __init__(
+        self,
+        docker_url: str,
+        api_version: str,
+        reconnect_delay_ms: int = 1000,
+    ):
+        self.docker_url = urlparse(docker_url)
+        if self.docker_url.scheme not in ("unix", "tcp", "http"):
+            raise RuntimeError(f"Unsupported docker host for log streaming: {docker_url}")
+        self.api_version = api_version
+        self.reconnect_delay = max(0, int(reconnect_delay_ms)) / 1000.0
+        self.loop = asyncio.new_event_loop()
+        self.loop_thread: Optional[threading.Thread] = None
+        self.streams: Dict[str, asyncio.Future] = {}
+        self.streams_lock = threading.Lock()
+
+    def start(self) -> None:
+        if self.loop_thread and self.loop_thread.is_alive():
+            return
+        self.loop_thread = threading.Thread(
+            target=self._run_loop, name="log_multiplexer", daemon=True
+        )
+        self.loop_thread.start()
+
+    def stop(self) -> None:
+        with self.streams_lock:
+            component_ids = list(self.streams.keys())
+        for component_id in component_ids:
+            self.detach(component_id)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        if self.loop_thread:
+            self.loop_thread.join(5)
+
+    def attach(
+        self,
+        component_id: str,
+        container_id: str,
+        on_line: Callable[[str, Optional[int]], None],
+        is_running: Callable[[], bool],
+        since_ns: Optional[int] = None,
+        tty: bool = False,
+    ) -> None:
+        """
+        Starts following container_id and hands each decoded line and its
+        timestamp in nanoseconds to on_line
+        is_running is called off-loop after a stream ends to decide on reconnects
+        tty must match the container, since only non-tty output is multiplexed
+        """
+        self.detach(component_id)
+        future = asyncio.run_coroutine_threadsafe(
+            self._follow(component_id, container_id, on_line, is_running, since_ns, tty),
+            self.loop,
+        )
+        with self.streams_lock:
+            self.streams[component_id] = future
+        future.add_done_callback(
+            lambda done, cid=component_id: self._forget(cid, done)
+        )
+
+    def detach(self, component_id: str) -> None:
+        with self.streams_lock:
+            future = self.streams.pop(component_id, None)
+        if future:
+            future.cancel()
+
+    def attached_count(self) -> int:
+        with self.streams_lock:
+            return len(self.streams)
+
+    def is_attached(self, component_id: str) -> bool:
+        with self.streams_lock:
+            return component_id in self.streams
+
+    def _forget(self, component_id: str, future) -> None:
+        with self.streams_lock:
+            if self.streams.get(component_id) is future:
+                del self.streams[component_id]
+        if not future.cancelled() and future.exception() is not None:
+            logging.error(f"[{component_id}]: log stream ended with error: {future.exception()}")
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    async def _open_connection(self):
+        if self.docker_url.scheme == "unix":
+            return await asyncio.open_unix_connection(self.docker_url.path)
+        return await asyncio.open_connection(
+            self.docker_url.hostname, self.docker_url.port or 2375
+        )
+
+    async def _follow(self, component_id, container_id, on_line, is_running, since_ns, tty):
+        while True:
+            stream_start = time.time_ns()
+            try:
+                last_timestamp = await self._read_stream(container_id, on_line, since_ns, tty)
+                if last_timestamp is not None:
+                    since_ns = last_timestamp
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.warning(f"[{component_id}]: log stream lost: {e}")
+                since_ns = since_ns or stream_start
+
+            try:
+                still_running = await self.loop.run_in_executor(None, is_running)
+            except Exception as e:
+                # The daemon may be restarting; keep following until it answers
+                logging.warning(f"[{component_id}]: could not check container state: {e}")
+                still_running = True
+            if not still_running:
+                logging.debug(f"[{component_id}]: container exited, log stream closed")
+                return
+            logging.debug(f"[{component_id}]: reconnecting log stream since {since_ns}")
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def _read_stream(self, container_id, on_line, since_ns, tty) -> Optional[int]:
+        """
+        Reads one log stream until EOF and returns the timestamp of the last line
+        """
+        params = {"follow": 1, "stdout": 1, "stderr": 1, "timestamps": 1}
+        if since_ns:
+            params["since"] = f"{since_ns // 1_000_000_000}.{since_ns % 1_000_000_000:09d}"
+        request = (
+            f"GET /v{self.api_version}/containers/{container_id}/logs?{urlencode(params)} HTTP/1.1\r\n"
+            f"Host: docker\r\n"
+            f"Accept: application/vnd.docker.multiplexed-stream\r\n"
+            f"\r\n"
+        )
+
+        reader, writer = await self._open_connection()
+        try:
+            writer.write(request.encode("ascii"))
+            await writer.drain()
+
+            status_line = await reader.readline()
+            parts = status_line.decode("latin-1").split(" ", 2)
+            if len(parts) < 2 or parts[1] != "200":
+                raise LogStreamError(f"unexpected response {status_line!r}")
+            headers = {}
+            while True:
+                header_line = await reader.readline()
+                if header_line in (b"\r\n", b"\n", b""):
+                    break
+                key, _, value = header_line.decode("latin-1").partition(":")
+                headers[key.strip().lower()] = value.strip()
+
+            chunked = headers.get("transfer-encoding", "").lower() == "chunked"
+            multiplexed = not tty
+
+            # since= is inclusive, so the last line already seen is skipped
+            stream_state = {"since_ns": since_ns or 0, "last_timestamp": None}
+
+            def emit(line: bytes) -> None:
+                self._emit(line, on_line, stream_state)
+
+            pending = b""
+            partial_lines = {}
+            async for data in self._read_body(reader, chunked):
+                if not multiplexed:
+                    partial_lines[1] = self._split_lines(
+                        partial_lines.get(1, b"") + data, emit
+                    )
+                    continue
+                pending += data
+                while len(pending) >= STREAM_HEADER_SIZE:
+                    stream_type, frame_size = struct.unpack(
+                        ">BxxxL", pending[:STREAM_HEADER_SIZE]
+                    )
+                    frame_end = STREAM_HEADER_SIZE + frame_size
+                    if len(pending) < frame_end:
+                        break
+                    frame = pending[STREAM_HEADER_SIZE:frame_end]
+                    pending = pending[frame_end:]
+                    partial_lines[stream_type] = self._split_lines(
+                        partial_lines.get(stream_type, b"") + frame, emit
+                    )
+
+            for remainder in partial_lines.values():
+                if remainder:
+                    emit(remainder)
+            return stream_state["last_timestamp"]
+        finally:
+            writer.close()
+
+    async def _read_body(self, reader: asyncio.StreamReader, chunked: bool):
+        if not chunked:
+            while True:
+                data = await reader.read(READ_SIZE)
+                if not data:
+                    return
+                yield data
+
+        while True:
+            size_line = await reader.readline()
+            if not size_line:
+                return
+            chunk_size = int(size_line.split(b";", 1)[0].strip() or b"0", 16)
+            if chunk_size == 0:
+                return
+            yield await reader.readexactly(chunk_size)
+            await reader.readline()
+
+    def _split_lines(self, data: bytes, emit) -> bytes:
+        *lines, remainder = data.split(b"\n")
+        for line in lines:
+            emit(line)
+        return remainder
+
+    def _emit(self, line: bytes, on_line, stream_state) -> None:
+        text = line.decode("utf-8", errors="replace")
+        timestamp_ns = None
+        prefix, separator, message = text.partition(" ")
+        if separator and prefix.endswith("Z"):
+            try:
+                timestamp_ns = parse_docker_timestamp(prefix)
+                text = message
+            except ValueError:
+                timestamp_ns = None
+        if timestamp_ns is not None:
+            if timestamp_ns <= stream_state["since_ns"]:
+                return
+            stream_state["last_timestamp"] = timestamp_ns
+        try:
+            on_line(text, timestamp_ns)
+        except Exception as e:
+            logging.error(f"log line handler failed with error: {e}")
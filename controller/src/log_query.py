@@ -0,0 +1,164 @@
+import calendar
+import time
+from typing import Any, Dict, Iterator, Optional
+
+DEFAULT_LIMIT = 1000
+MAX_LIMIT = 50000
+
+_last_second = ("", 0)
+
+
+def parse_time(value: Any) -> int:
+    """
+    Converts integer nanoseconds or an RFC3339 UTC timestamp
+    (2024-01-01T00:00:00.123456789Z) to integer nanoseconds
+    Raises ValueError on anything else
+    """
+    if isinstance(value, bool):
+        raise ValueError(f"invalid timestamp {value!r}")
+    if isinstance(value, int):
+        return value
+    value = str(value)
+    if value.isdigit():
+        return int(value)
+    if not value.endswith("Z"):
+        raise ValueError(f"timestamp {value!r} must be UTC (end in Z)")
+    fraction = value[:-1].partition(".")[2]
+    if fraction and not fraction.isdigit():
+        raise ValueError(f"invalid timestamp {value!r}")
+    return parse_docker_timestamp(value)
+
+
+def parse_docker_timestamp(value: str) -> int:
+    """
+    Converts a Docker RFC3339Nano log timestamp to integer nanoseconds
+    """
+    global _last_second
+    seconds_part, _, fraction = value.rstrip("Z").partition(".")
+    # Read the cache once: other threads may replace it between two reads
+    cached = _last_second
+    if cached[0] != seconds_part:
+        cached = (
+            seconds_part,
+            calendar.timegm(time.strptime(seconds_part, "%Y-%m-%dT%H:%M:%S")),
+        )
+        _last_second = cached
+    seconds = cached[1]
+    return seconds * 1_000_000_000 + int((fraction or "0")[:9].ljust(9, "0"))
+
+
+def format_time(timestamp_ns: int) -> str:
+    """
+    Formats integer nanoseconds as RFC3339Nano UTC
+    """
+    seconds, nanos = divmod(timestamp_ns, 1_000_000_000)
+    return f"{time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(seconds))}.{nanos:09d}Z"
+
+
+def flux_string(value: str) -> str:
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("${", "\\${") + '"'
+
+
+def build_log_query(
+    bucket: str,
+    component_id: str,
+    start_ns: int,
+    stop_ns: Optional[int] = None,
+    limit: int = DEFAULT_LIMIT,
+    tail: bool = False,
+) -> str:
+    """
+    Flux query for the stdout_log lines of one component in [start_ns, stop_ns)
+    The row limit is applied by InfluxDB: the first limit lines of the range,
+    or the last limit lines with tail
+    """
+    stop = f", stop: time(v: {stop_ns})" if stop_ns is not None else ""
+    order = f'''
+        |> sort(columns: ["_time"], desc: true)
+        |> limit(n: {limit})
+        |> sort(columns: ["_time"])''' if tail else f'''
+        |> sort(columns: ["_time"])
+        |> limit(n: {limit})'''
+    return f'''
+        from(bucket: {flux_string(bucket)})
+        |> range(start: time(v: {start_ns}){stop})
+        |> filter(fn: (r) => r._measurement == "component_log")
+        |> filter(fn: (r) => r["id"] == {flux_string(component_id)})
+        |> filter(fn: (r) => r._field == "stdout_log")
+        |> keep(columns: ["_time", "_value"])
+        |> group(){order}
+        |> map(fn: (r) => ({{r with ns: int(v: r._time)}}))
+    '''
+
+
+class LogPage:
+    """
+    One page of component log lines, read lazily from InfluxDB
+    After iterating, next_cursor resumes right after the last line returned
+    and complete tells whether the range has no lines outside the page
+    One line past the limit is fetched to tell; with tail the lines before
+    the page are checked by a second query when complete is first read
+    """
+
+    def __init__(
+        self,
+        influxdb_client,
+        bucket: str,
+        component_id: str,
+        start_ns: int,
+        stop_ns: Optional[int] = None,
+        limit: int = DEFAULT_LIMIT,
+        tail: bool = False,
+    ):
+        self.query = build_log_query(bucket, component_id, start_ns, stop_ns, limit if tail else limit + 1, tail)
+        self.influxdb_client = influxdb_client
+        self.bucket = bucket
+        self.component_id = component_id
+        self.start_ns = start_ns
+        self.limit = limit
+        self.tail = tail
+        self.count = 0
+        self.first_ns: Optional[int] = None
+        self.last_ns = start_ns - 1
+        self.more = False
+        self.check_earlier = False
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        query_api = self.influxdb_client.query_api()
+        records = query_api.query_stream(org=self.influxdb_client.org, query=self.query)
+        for record in records:
+            if self.count == self.limit:
+                self.more = True
+                break
+            self.count += 1
+            if self.first_ns is None:
+                self.first_ns = record["ns"]
+            self.last_ns = record["ns"]
+            yield {"time": format_time(record["ns"]), "message": record.get_value()}
+        self.check_earlier = self.tail and self.count == self.limit
+
+    @property
+    def next_cursor(self) -> str:
+        return str(self.last_ns + 1)
+
+    @property
+    def complete(self) -> bool:
+        if self.check_earlier:
+            # A full tail page: complete only if nothing precedes its first line
+            self.check_earlier = False
+            earlier = LogPage(
+                self.influxdb_client, self.bucket, self.component_id, self.start_ns, self.first_ns, limit=1
+            )
+            self.more = next(iter(earlier), None) is not None
+        return not self.more
+
+
+def last_log_time(influxdb_client, bucket: str, component_id: str, start_ns: int) -> Optional[int]:
+    """
+    Timestamp of the newest stored log line of a component since start_ns,
+    None if there is none
+    """
+    page = LogPage(influxdb_client, bucket, component_id, start_ns, limit=1, tail=True)
+    for _ in page:
+        pass
+    return page.last_ns if page.count else None
@@ -0,0 +1,269 @@
+import logging
+import queue
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from influxdb_client import InfluxDBClient, WritePrecision
+from influxdb_client.client.write_api import SYNCHRONOUS
+
+from controller_metrics import INFLUX_WRITE_RECORDS, INFLUX_WRITE_SECONDS
+from spill_queue import SpillQueue
+
+
+class LogBatchWriter:
+    """
+    Controller-wide batching writer for InfluxDB
+    Worker threads submit line protocol records without blocking,
+    a single background thread writes them in batches by size or interval
+    Payloads are gzip encoded when the InfluxDB client has enable_gzip set
+    While InfluxDB is unreachable batches go to the spill queue, which is
+    replayed in order once the sink is healthy again
+    """
+
+    def __init__(
+        self,
+        influxdb_client: InfluxDBClient,
+        bucket: str = "rtusystem",
+        batch_size: int = 5000,
+        flush_interval_ms: int = 1000,
+        max_queue_size: int = 100000,
+        spill: Optional[SpillQueue] = None,
+        health_check_interval_ms: int = 2000,
+    ):
+        self.influxdb_client = influxdb_client
+        self.bucket = bucket
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = max(1, int(flush_interval_ms)) / 1000.0
+        self.queue: "queue.Queue[Tuple[str, str]]" = queue.Queue(
+            maxsize=max(1, int(max_queue_size))
+        )
+        self.counters: Dict[str, Dict[str, int]] = {}
+        self.counters_lock = threading.Lock()
+        self.flush_requested = threading.Event()
+        self.flush_done = threading.Condition()
+        self.flush_generation = 0
+        self.stop_event = threading.Event()
+        self.writer_thread: Optional[threading.Thread] = None
+        self.spill = spill
+        self.spill_pending = bool(spill) and not spill.is_empty()
+        self.sink_healthy = True
+        self.health_check_interval = max(1, int(health_check_interval_ms)) / 1000.0
+        self.last_health_check = 0.0
+
+    def start(self) -> None:
+        if self.writer_thread and self.writer_thread.is_alive():
+            return
+        self.stop_event.clear()
+        self.writer_thread = threading.Thread(
+            target=self._writer_loop, name="log_writer", daemon=True
+        )
+        self.writer_thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """
+        Flushes all queued records and stops the writer thread
+        """
+        self.flush(timeout)
+        self.stop_event.set()
+        self.flush_requested.set()
+        if self.writer_thread:
+            self.writer_thread.join(timeout)
+
+    def submit(self, component_id: str, line_protocol: str) -> bool:
+        """
+        Queues one line protocol record for component_id
+        Never blocks: returns False and counts a drop when the queue is full
+        """
+        try:
+            self.queue.put_nowait((component_id, line_protocol))
+        except queue.Full:
+            self._count(component_id, "dropped")
+            return False
+        self._count(component_id, "queued")
+        if self.queue.qsize() >= self.batch_size:
+            self.flush_requested.set()
+        return True
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """
+        Blocks until every record queued before the call has been handled
+        """
+        if not self.writer_thread or not self.writer_thread.is_alive():
+            return self.queue.empty()
+        with self.flush_done:
+            target = self.flush_generation + 1
+            self.flush_requested.set()
+            return self.flush_done.wait_for(
+                lambda: self.flush_generation >= target and self.queue.empty(),
+                timeout=timeout,
+            )
+
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        with self.counters_lock:
+            return {
+                component_id: dict(counts)
+                for component_id, counts in self.counters.items()
+            }
+
+    def queue_depth(self) -> int:
+        return self.queue.qsize()
+
+    def get_spill_stats(self) -> Dict[str, float]:
+        if not self.spill:
+            return {"sink_healthy": self.sink_healthy}
+        return {
+            "sink_healthy": self.sink_healthy,
+            "spill_bytes": self.spill.spill_bytes(),
+            "replay_lag_s": self.spill.replay_lag(),
+            "spill_dropped": self.spill.dropped_records,
+        }
+
+    def _count(self, component_id: str, counter: str, amount: int = 1) -> None:
+        with self.counters_lock:
+            counts = self.counters.setdefault(
+                component_id, {"queued": 0, "flushed": 0, "dropped": 0, "spilled": 0}
+            )
+            counts[counter] += amount
+
+    def _drain(self) -> List[Tuple[str, str]]:
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _count_batch(self, batch: List[Tuple[str, str]], counter: str) -> None:
+        per_component: Dict[str, int] = {}
+        for component_id, _ in batch:
+            per_component[component_id] = per_component.get(component_id, 0) + 1
+        for component_id, count in per_component.items():
+            self._count(component_id, counter, count)
+
+    def _write(self, write_api, batch: List[Tuple[str, str]]) -> None:
+        write_began = time.monotonic()
+        try:
+            write_api.write(
+                bucket=self.bucket,
+                record=[line for _, line in batch],
+                write_precision=WritePrecision.NS,
+            )
+        except Exception:
+            INFLUX_WRITE_RECORDS.inc(len(batch), outcome="failed")
+            raise
+        finally:
+            INFLUX_WRITE_SECONDS.observe(time.monotonic() - write_began)
+        INFLUX_WRITE_RECORDS.inc(len(batch), outcome="written")
+
+    def _spill_batch(self, batch: List[Tuple[str, str]]) -> None:
+        try:
+            self.spill.append(batch)
+        except OSError as e:
+            logging.error(f"Failed to spill {len(batch)} log records: {e}")
+            self._count_batch(batch, "dropped")
+            return
+        self.spill_pending = True
+        self._count_batch(batch, "spilled")
+
+    def _write_batch(self, write_api, batch: List[Tuple[str, str]]) -> None:
+        if self.spill:
+            # Keep ordering: nothing bypasses records already waiting on disk
+            if not self.sink_healthy or self.spill_pending:
+                self._spill_batch(batch)
+                return
+            try:
+                self._write(write_api, batch)
+            except Exception as e:
+                logging.warning(f"Error pushing log batch: {e}. Spilling to disk")
+                self.sink_healthy = False
+                self.last_health_check = time.monotonic()
+                self._spill_batch(batch)
+                return
+            self._count_batch(batch, "flushed")
+            return
+
+        while True:
+            try:
+                self._write(write_api, batch)
+                break
+            except Exception as e:
+                if self.stop_event.is_set():
+                    logging.error(f"Dropping {len(batch)} log records on shutdown: {e}")
+                    self._count_batch(batch, "dropped")
+                    return
+                logging.warning(f"Error pushing log batch: {e}. Retrying...")
+                time.sleep(1)
+        self._count_batch(batch, "flushed")
+
+    def _check_sink(self) -> None:
+        now = time.monotonic()
+        if now - self.last_health_check < self.health_check_interval:
+            return
+        self.last_health_check = now
+        try:
+            self.sink_healthy = bool(self.influxdb_client.ping())
+        except Exception:
+            self.sink_healthy = False
+        if not self.sink_healthy:
+            stats = self.get_spill_stats()
+            logging.warning(
+                f"InfluxDB unavailable: {stats['spill_bytes']} bytes spilled, "
+                f"replay lag {stats['replay_lag_s']:.1f}s"
+            )
+
+    def _replay(self, write_api) -> None:
+        """
+        Writes spilled segments oldest first until the spill queue is empty
+        Newly queued batches are appended behind them meanwhile
+        """
+        while self.sink_healthy and self.spill_pending:
+            segment = self.spill.pop_segment()
+            if segment is None:
+                self.spill_pending = False
+                logging.info("Spill queue replay complete")
+                return
+            path, records = segment
+            try:
+                for i in range(0, len(records), self.batch_size):
+                    self._write(write_api, records[i:i + self.batch_size])
+            except Exception as e:
+                logging.warning(f"Spill replay interrupted: {e}")
+                self.sink_healthy = False
+                self.last_health_check = time.monotonic()
+                return
+            self.spill.commit(path)
+            self._count_batch(records, "flushed")
+
+            batch = self._drain()
+            if batch:
+                self._spill_batch(batch)
+
+    def _writer_loop(self) -> None:
+        with self.influxdb_client.write_api(write_options=SYNCHRONOUS) as write_api:
+            while True:
+                self.flush_requested.wait(self.flush_interval)
+                self.flush_requested.clear()
+
+                if self.spill and not self.sink_healthy:
+                    self._check_sink()
+
+                while True:
+                    batch = self._drain()
+                    if not batch:
+                        break
+                    self._write_batch(write_api, batch)
+
+                if self.spill:
+                    self._replay(write_api)
+                    self.spill.sync()
+
+                with self.flush_done:
+                    self.flush_generation += 1
+                    self.flush_done.notify_all()
+
+                if self.stop_event.is_set():
+                    if self.spill:
+                        self.spill.close()
+                    break
@@ -25,20 +25,95 @@ from rach_worker_thread import rach_agent
 from ofh_worker_thread import ofh_attacker
 from uu_agent_worker_thread import uu_agent
 
-from influxdb_client import InfluxDBClient, WriteApi
+from concurrent.futures import ThreadPoolExecutor
+
+from influxdb_client import InfluxDBClient, Point, WriteApi, WritePrecision
 
 from control_handler import SystemControlHandler
+from control_server import ControlServer
 from globals import Config, Globals
+from config_index import DEFAULT_DIRECTORIES, DEFAULT_IGNORE, ConfigIndex
+from config_store import ConfigStore
+from container_pool import ContainerPool, remove_slot_config
+from controller_metrics import METRICS, MetricsReporter, observe_docker_response
+from log_query import last_log_time, parse_docker_timestamp
+from log_writer import LogBatchWriter
+from nodes import Cluster
+from reconciler import Reconciler
+from shutdown import ShutdownCoordinator
+from spill_queue import SpillQueue
+from state_store import STATE_FILE, StateStore, adoptable_container, config_hash, host_to_local
+from startup_scheduler import StartupScheduler
+from supervisor import Supervisor
 
 
 def handle_signal(signum, frame):
-    for process_meta in Globals.process_metadata:
-        process_meta["handle"].stop()
-        logging.debug(f"Killed process {process['id']}")
+    if Globals.shutting_down:
+        logging.warning("Shutdown already in progress")
+        return
+    Globals.shutting_down = True
+    teardown_began = time.monotonic()
+    logging.info(f"Received signal {signum}, shutting down")
+
+    if Config.reconciler:
+        Config.reconciler.stop()
+    if Config.supervisor:
+        Config.supervisor.stop()
+    if Config.metrics_reporter:
+        Config.metrics_reporter.stop()
+
+    keep_running = bool(Config.options.get("keep_running_on_exit", False)) if Config.options else False
+    if Config.state_store:
+        Config.state_store.stop()
+        if keep_running:
+            # The next controller adopts the containers from the saved state
+            Config.state_store.flush()
+
+    process_metadata = [] if keep_running else Globals.process_registry.snapshot()
+    coordinator = ShutdownCoordinator(
+        Config.options.get("stop_grace_s", {}) if Config.options else {},
+        Config.options.get("shutdown_concurrency", 16) if Config.options else 16,
+    )
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="pool_drain") as executor:
+        if Config.container_pool:
+            executor.submit(Config.container_pool.drain)
+        durations = coordinator.run(process_metadata)
+    for process_meta in process_metadata:
+        remove_slot_config(process_meta["config"].get("config_file", ""))
+    if Config.state_store and not keep_running:
+        Config.state_store.clear()
+
+    if Config.cluster:
+        Config.cluster.stop()
+    if Config.control_server:
+        Config.control_server.close_connections()
+
+    teardown_time = time.monotonic() - teardown_began
+    slowest = max(durations, key=durations.get) if durations else None
+    logging.info(
+        f"Stopped {len(durations)} processes in {teardown_time:.3f}s"
+        + (f", slowest {slowest} ({durations[slowest]:.3f}s)" if slowest else "")
+    )
+    if Config.log_writer:
+        point = (
+            Point("controller_shutdown")
+            .field("teardown_ms", teardown_time * 1000)
+            .field("processes", len(durations))
+            .time(time.time_ns(), WritePrecision.NS)
+        )
+        Config.log_writer.submit("controller", point.to_line_protocol())
+        Config.log_writer.stop()
     sys.exit(0)
 
+def handle_reload(signum, frame):
+    if Config.reconciler:
+        logging.info("Received SIGHUP, reloading config")
+        Config.reconciler.request()
+
+
 signal.signal(signal.SIGINT, handle_signal)
 signal.signal(signal.SIGTERM, handle_signal)
+signal.signal(signal.SIGHUP, handle_reload)
 
 
 def configure() -> None:
@@ -72,6 +147,217 @@ def configure() -> None:
     with open(str(args.config), 'r') as file:
         Config.options = yaml.safe_load(file)
 
+    Config.log_schema = (Config.options or {}).get("log_schema", "compact")
+    if Config.log_schema not in ("compact", "legacy"):
+        raise ValueError(f"Invalid log_schema: {Config.log_schema}")
+
+
+def start_process(process_meta) -> None:
+    """
+    Starts one process and waits until its dependents may start
+    """
+    process_handle = process_meta["handle"]
+    adoption = process_meta.pop("adopt", None)
+    if adoption:
+        try:
+            process_handle.adopt(*adoption)
+            logging.info(f"Adopted running container of {process_meta['id']}")
+            return
+        except Exception as e:
+            logging.warning(f"Failed to adopt {process_meta['id']}, recreating it: {e}")
+    process_handle.start()
+
+    process_config = process_meta["config"]
+    if process_handle.readiness:
+        logging.debug(f"Waiting for {process_meta['id']} readiness")
+        if not process_handle.wait_ready():
+            raise RuntimeError(f"{process_meta['id']} not ready: waiting on {', '.join(process_handle.readiness.pending())}")
+    elif "sleep_ms" in process_config.keys():
+        logging.debug(f"Sleeping for {process_config['sleep_ms']}")
+        sleep_time = float(process_config["sleep_ms"])/1000.0
+        time.sleep(sleep_time)
+
+
+def build_process(process_config, preferred_node=None, leaving=()):
+    """
+    Validates one entry of the processes list, resolves its config file,
+    places it on a node and returns its registry entry with a handle that
+    is not started yet
+    """
+    if "id" not in process_config.keys():
+        raise RuntimeError("id field required for each process")
+
+    if "type" not in process_config.keys():
+        raise RuntimeError("type field required for each process")
+
+    if "config_file" not in process_config.keys():
+        raise RuntimeError("config_file field required for each process")
+
+    process_config["config_file"] = os.path.join("/host",process_config["config_file"])
+    if not os.path.exists(process_config["config_file"]):
+        logging.warning(f"File {process_config['config_file']} not found searching config directories")
+        process_config["config_file"] = Config.config_index.resolve(process_config["config_file"])
+        logging.info(f"Found config file {process_config['config_file']}")
+    process_config["config_file"] = process_config["config_file"].replace("/host", os.getenv("DOCKER_SYSTEM_DIRECTORY"))
+    logging.debug(f"Filename on host {process_config['config_file']}")
+
+    permissions = []
+    if "permissions" in process_config.keys():
+        permissions = process_config["permissions"]
+    process_config["permissions"] = permissions
+
+    process_class = None
+    try:
+        process_class = globals()[process_config["type"]]
+    except KeyError:
+        raise RuntimeError(f"Invalid process type {process_config['type']}")
+
+    Config.cluster.place(process_config, preferred=preferred_node, leaving=leaving)
+    try:
+        process_handle = process_class(Config.influxdb_client, Config.docker_client, process_config)
+    except Exception:
+        Config.cluster.settle([process_config["id"]])
+        raise
+    process_token = None
+    if hasattr(process_handle, "get_token"):
+        process_token = process_handle.get_token()
+
+    return {
+        'id': process_config['id'],
+        'type': process_config['type'],
+        'config': process_config,
+        'handle': process_handle,
+        'token': {process_token: permissions},
+        'source': 'config',
+        'config_hash': config_hash(process_config),
+    }
+
+
+def resume_log_position(component_id, container, entry):
+    """
+    Returns the timestamp of the last log line of an adopted container that
+    reached InfluxDB, falling back to the last line read by the previous controller
+    """
+    started_ns = parse_docker_timestamp(container.attrs["State"]["StartedAt"])
+    try:
+        return last_log_time(Config.influxdb_client, Config.log_writer.bucket, component_id, started_ns)
+    except Exception as e:
+        logging.warning(f"Failed to query last log line of {component_id}: {e}")
+        return entry.get("last_log_ns") or None
+
+
+def plan_adoption(process_meta, entry) -> None:
+    """
+    Marks a configured process for adoption when the previous controller
+    left its container running with the same configuration
+    """
+    if entry is None:
+        return
+    if entry.get("config_hash") != process_meta["config_hash"]:
+        logging.info(f"Configuration of {process_meta['id']} changed, recreating its container")
+        return
+    container = adoptable_container(process_meta["handle"].config.docker_client, entry)
+    if container is None:
+        logging.info(f"Container of {process_meta['id']} is no longer running, recreating it")
+        return
+
+    process_handle = process_meta["handle"]
+    for token, _ in entry.get("tokens", []):
+        if hasattr(process_handle, "set_token"):
+            process_handle.set_token(token)
+            process_meta["token"] = {token: process_meta["config"]["permissions"]}
+    process_meta["adopt"] = (
+        container,
+        resume_log_position(process_meta["id"], container, entry),
+        entry.get("log_sequence", 0),
+    )
+
+
+def restore_api_process(entry):
+    """
+    Rebuilds the registry entry of a component started through the API
+    whose container is still running, None if it cannot be adopted
+    """
+    process_class = globals().get(entry.get("type"))
+    if process_class is None:
+        return None
+    try:
+        Config.cluster.place(entry["config"])
+    except (RuntimeError, KeyError) as e:
+        logging.warning(f"Failed to restore {entry['id']}: {e}")
+        return None
+    try:
+        container = adoptable_container(Config.cluster.node(entry["config"]["node"]).docker_client, entry)
+        if container is None:
+            Config.cluster.settle([entry["id"]])
+            return None
+        process_handle = process_class(Config.influxdb_client, Config.docker_client, entry["config"])
+    except (RuntimeError, KeyError) as e:
+        logging.warning(f"Failed to restore {entry['id']}: {e}")
+        Config.cluster.settle([entry["id"]])
+        return None
+    Config.config_store.adopt(entry["id"], host_to_local(entry["config"].get("config_file", "")))
+    return {
+        'id': entry['id'],
+        'type': entry['type'],
+        'config': entry['config'],
+        'handle': process_handle,
+        'token': {None: []},
+        'source': 'api',
+        'config_hash': entry['config_hash'],
+        'adopt': (container, resume_log_position(entry['id'], container, entry), entry.get('log_sequence', 0)),
+    }
+
+
+def remove_orphan(entry) -> None:
+    """
+    Removes the container of a process that is no longer configured
+    """
+    container_id = entry.get("container_id")
+    if not container_id:
+        return
+    try:
+        node = Config.cluster.node(entry.get("config", {}).get("node"))
+        container = node.docker_client.containers.get(container_id)
+        if container.name == entry["id"]:
+            container.remove(force=True)
+            logging.info(f"Removed container of {entry['id']}, which is no longer configured")
+    except (docker.errors.NotFound, RuntimeError):
+        pass
+    except docker.errors.APIError as e:
+        logging.warning(f"Failed to remove container of {entry['id']}: {e}")
+
+
+def register_controller_metrics() -> None:
+    """
+    Gauges read from controller state whenever metrics are collected
+    """
+    METRICS.gauge("rt_log_queue_depth", "Records waiting in the log writer queue", Config.log_writer.queue_depth)
+    METRICS.gauge(
+        "rt_log_spill_bytes", "Bytes of records spilled to disk",
+        lambda: Config.log_writer.get_spill_stats().get("spill_bytes", 0)
+    )
+    METRICS.gauge(
+        "rt_log_writer_records", "Records handled by the log writer per component and outcome",
+        lambda: [
+            ({"component": component_id, "outcome": outcome}, count)
+            for component_id, counts in Config.log_writer.get_stats().items()
+            for outcome, count in counts.items()
+        ]
+    )
+    METRICS.gauge(
+        "rt_log_streams", "Container log streams being followed per node",
+        lambda: [({"node": name}, node.log_multiplexer.attached_count()) for name, node in Config.cluster.nodes.items()]
+    )
+    METRICS.gauge("rt_components", "Registered components", lambda: len(Globals.process_registry))
+    METRICS.gauge(
+        "rt_pool_available", "Idle warm pool containers per type",
+        lambda: [
+            ({"type": component_type}, stats["available"])
+            for component_type, stats in Config.container_pool.get_stats().items()
+        ]
+    )
+
 
 def start_subprocess_threads():
     """
@@ -99,80 +385,116 @@ def start_subprocess_threads():
     Config.influxdb_client = InfluxDBClient(
         f"http://{influxdb_host}:{influxdb_port}",
         org=influxdb_org,
-        token=influxdb_token
+        token=influxdb_token,
+        enable_gzip=True
     )
 
-    Config.docker_client = docker.from_env()
+    spill_options = Config.options.get("log_spill", {}) or {}
+    log_spill = None
+    if spill_options.get("enabled", True):
+        log_spill = SpillQueue(
+            spill_options.get("directory", "/host/.log_spill"),
+            segment_max_bytes=int(spill_options.get("segment_max_mb", 16)) * 1024 * 1024,
+            max_bytes=int(spill_options.get("max_mb", 1024)) * 1024 * 1024,
+            fsync_interval_ms=spill_options.get("fsync_interval_ms", 1000)
+        )
+
+    writer_options = Config.options.get("log_writer", {}) or {}
+    Config.log_writer = LogBatchWriter(
+        Config.influxdb_client,
+        bucket=writer_options.get("bucket", "rtusystem"),
+        batch_size=writer_options.get("batch_size", 5000),
+        flush_interval_ms=writer_options.get("flush_interval_ms", 1000),
+        max_queue_size=writer_options.get("max_queue_size", 100000),
+        spill=log_spill,
+        health_check_interval_ms=writer_options.get("health_check_interval_ms", 2000)
+    )
+    Config.log_writer.start()
+
+    Config.supervisor = Supervisor(Config.options.get("supervisor_workers", 4))
+    Config.cluster = Cluster.from_config(Config.options.get("nodes"), Globals.process_registry)
+    for node in Config.cluster.nodes.values():
+        node.docker_client.api.hooks["response"].append(observe_docker_response)
+        node.start([Config.supervisor.handle_event], Config.options.get("log_reconnect_delay_ms", 1000))
+
+    # The default node also serves the container pool and single-host code paths
+    local_node = Config.cluster.default
+    Config.docker_client = local_node.docker_client
+    Config.docker_events = local_node.docker_events
+    Config.image_index = local_node.image_index
+    Config.network_manager = local_node.network_manager
+    Config.container_status = local_node.container_status
+    Config.log_multiplexer = local_node.log_multiplexer
+
+    Config.config_store = ConfigStore(retention_s=Config.options.get("config_store_retention_s", 600))
+
+    index_options = Config.options.get("config_index", {})
+    Config.config_index = ConfigIndex(
+        directories=index_options.get("directories", DEFAULT_DIRECTORIES),
+        ignore=index_options.get("ignore", DEFAULT_IGNORE),
+    )
 
+    required_types = [process_config.get("type") for process_config in Config.options.get("processes", [])]
+    required_types += list((Config.options.get("container_pool", {}) or {}).keys())
+    required_images = set()
+    for process_type in required_types:
+        image_name = getattr(globals().get(process_type), "image_name", None)
+        if image_name:
+            required_images.add(image_name)
+    for node in Config.cluster.nodes.values():
+        missing_images = node.image_index.verify(required_images)
+        if missing_images:
+            raise RuntimeError(f"Required Docker images {', '.join(missing_images)} not found on node {node.name}: Please run 'sudo docker compose --profile components build' or 'sudo docker compose --profile components pull'")
+
+    Config.state_store = StateStore(
+        Config.options.get("state_file", STATE_FILE),
+        Config.options.get("state_flush_interval_ms", 1000),
+    )
+    saved_state = Config.state_store.load() if Config.options.get("adopt_containers", True) else {}
+
+    # Components started through the API keep their node, so they are placed first
     process_metadata = []
-    process_ids = []
+    for entry in list(saved_state.values()):
+        if entry.get("source") != "api":
+            continue
+        del saved_state[entry["id"]]
+        process_meta = restore_api_process(entry)
+        if process_meta:
+            process_metadata.append(process_meta)
+        else:
+            remove_orphan(entry)
+
     for process_config in Config.options.get("processes", []):
+        entry = saved_state.pop(process_config.get("id"), None)
+        process_meta = build_process(process_config, preferred_node=(entry or {}).get("config", {}).get("node"))
+        plan_adoption(process_meta, entry)
+        process_metadata.append(process_meta)
 
-        if "id" not in process_config.keys():
-            raise RuntimeError("id field required for each process")
-
-        if "type" not in process_config.keys():
-            raise RuntimeError("type field required for each process")
-
-        if "config_file" not in process_config.keys():
-            raise RuntimeError("config_file field required for each process")
-
-        process_config["config_file"] = os.path.join("/host",process_config["config_file"])
-        if not os.path.exists(process_config["config_file"]):
-            logging.warning(f"File {process_config['config_file']} not found searching root")
-            config_basename = process_config["config_file"].split("/")[-1]
-            found = False
-            for root, _, files in os.walk("/host"):
-                if config_basename in files:
-                    process_config["config_file"] = os.path.join(root, config_basename)
-                    logging.info(f"Found config file {process_config['config_file']}")
-                    found = True
-                    break
-            if not found:
-                raise RuntimeError(f"config file {process_config['config_file']} not found")
-        process_config["config_file"] = process_config["config_file"].replace("/host", os.getenv("DOCKER_SYSTEM_DIRECTORY"))
-        logging.debug(f"Filename on host {process_config['config_file']}")
-
-
-        if "depends_on" in process_config.keys():
-            depends_on_list = list(process_config["depends_on"])
-            for dependency in depends_on_list:
-                found_dep = False
-                for process_data in process_metadata:
-                    if process_data["id"] == dependency:
-                        found_dep = True
-                if not found_dep:
-                    raise RuntimeError(f"Did not find dependent process '{dependency}' for '{process_config['id']}'")
-
-        permissions = []
-        if "permissions" in process_config.keys():
-            permissions = process_config["permissions"]
-        process_config["permissions"] = permissions
-
-        process_class = None
-        try:
-            process_class = globals()[process_config["type"]]
-        except KeyError:
-            raise RuntimeError(f"Invalid process type {process_config['type']}")
+    for entry in saved_state.values():
+        remove_orphan(entry)
 
-        process_handle = process_class(Config.influxdb_client, Config.docker_client, process_config)
-        process_token = None
-        if hasattr(process_handle, "get_token"):
-            process_token = process_handle.get_token()
-
-        process_metadata.append({
-            'id': process_config['id'],
-            'type': process_config['type'],
-            'config': process_config,
-            'handle': process_handle,
-            'token': {process_token: permissions}
-        })
-        process_handle.start()
-
-        if "sleep_ms" in process_config.keys():
-            logging.debug(f"Sleeping for {process_config['sleep_ms']}")
-            sleep_time = float(process_config["sleep_ms"])/1000.0
-            time.sleep(sleep_time)
+    # Adopted components must hold their stored configs before unused ones are removed
+    Config.config_store.collect()
+
+    def register_and_start(process_meta):
+        # Registered before its container exists, so a shutdown during startup stops it too
+        Globals.process_registry.add(process_meta)
+        start_process(process_meta)
+
+    scheduler = StartupScheduler(Config.options.get("startup_concurrency", 4))
+    scheduler.run(process_metadata, register_and_start)
+
+    Config.container_pool = ContainerPool(
+        {"rtue": rtue, "jammer": jammer, "sniffer": sniffer},
+        Config.options.get("container_pool", {})
+    )
+    Config.container_pool.start()
+
+    register_controller_metrics()
+    Config.metrics_reporter = MetricsReporter(
+        METRICS, Config.log_writer, Config.options.get("metrics_interval_ms", 10000)
+    )
+    Config.metrics_reporter.start()
 
     for obj in process_metadata:
         logging.debug(f"{obj['id']} {obj['token']}")
@@ -204,13 +526,33 @@ if __name__ == '__main__':
 
 
     configure()
-    Globals.process_metadata = start_subprocess_threads()
-
-    server = http.server.HTTPServer((control_ip, control_port), SystemControlHandler)
+    process_metadata = start_subprocess_threads()
+    Config.cluster.settle([process_meta["id"] for process_meta in process_metadata])
+    Config.state_store.start(Globals.process_registry)
+    Config.state_store.flush()
+
+    Config.reconciler = Reconciler(
+        Config.filename,
+        build_process,
+        start_process,
+        max_concurrency=Config.options.get("reload_concurrency", Config.options.get("startup_concurrency", 4)),
+        poll_interval_ms=Config.options.get("config_watch_interval_ms", 2000),
+        watch=Config.options.get("config_watch", True),
+    )
+    Config.reconciler.start()
 
     context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
     context.load_cert_chain(certfile="/server.pem", keyfile="/server.key")
-    server.socket = context.wrap_socket(server.socket, server_side=True)
+
+    server = Config.control_server = ControlServer(
+        (control_ip, control_port),
+        SystemControlHandler,
+        context,
+        max_workers=Config.options.get("api_workers", 64),
+        request_timeout=Config.options.get("api_request_timeout_s", 15),
+        idle_timeout=Config.options.get("api_idle_timeout_s", 5),
+        max_log_streams=Config.options.get("log_stream_max", 16),
+    )
 
     logging.debug(f"control API setup on https://{control_ip}:{control_port}")
 
@@ -0,0 +1,234 @@
+import logging
+import re
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional, Tuple
+
+ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;]*m")
+BANNER_SECTION = re.compile(r"-{2,}\s*([A-Za-z]+)\s*-{2,}")
+COLUMN_NAME = re.compile(r"[^0-9a-z]+")
+NUMBER = re.compile(r"^([-+]?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)([kKMGmunp%]?)$")
+
+SI_SCALE = {
+    "": 1.0,
+    "%": 1.0,
+    "k": 1e3,
+    "K": 1e3,
+    "M": 1e6,
+    "G": 1e9,
+    "m": 1e-3,
+    "u": 1e-6,
+    "n": 1e-9,
+    "p": 1e-12,
+}
+
+# (tags, fields) for one parsed table row
+Sample = Tuple[Dict[str, str], Dict[str, float]]
+
+
+def parse_number(value: str) -> Optional[float]:
+    """
+    Converts srsRAN console values such as 18M, 9.5k, -91m or 0% to floats
+    Returns None for placeholders like -- or n/a
+    """
+    match = NUMBER.match(value)
+    if not match:
+        return None
+    return float(match.group(1)) * SI_SCALE[match.group(2)]
+
+
+def column_name(name: str, section: str = "") -> str:
+    name = name.strip().lower().replace("%", "pct")
+    name = COLUMN_NAME.sub("_", name).strip("_")
+    section = section.lower()
+    if section and not name.startswith(f"{section}_"):
+        return f"{section}_{name}"
+    return name
+
+
+class TableParser(ABC):
+    """
+    Stateful parser for one kind of periodic console table
+    parse() is called for every log line of a component and returns a
+    sample for data rows, so it must reject unrelated lines cheaply
+    """
+
+    measurement = ""
+    tag_columns: Tuple[str, ...] = ()
+
+    def __init__(self, prefix: str = ""):
+        self.prefix = prefix
+
+    def parse(self, line: str) -> Optional[Sample]:
+        if "|" not in line:
+            return None
+        if self.prefix:
+            if not line.startswith(self.prefix):
+                return None
+            line = line[len(self.prefix):]
+        if "\x1b" in line:
+            line = ANSI_ESCAPE.sub("", line)
+        return self.parse_table_line(line.strip())
+
+    @abstractmethod
+    def parse_table_line(self, line: str) -> Optional[Sample]:
+        """
+        Parses one table line with the prefix and ANSI escapes removed
+        """
+
+    def make_sample(self, names: List[str], values: List[str]) -> Optional[Sample]:
+        tags = {}
+        fields = {}
+        for name, value in zip(names, values):
+            if name in self.tag_columns:
+                tags[name] = value
+                continue
+            number = parse_number(value)
+            if number is not None:
+                fields[name] = number
+        if not fields:
+            return None
+        return tags, fields
+
+
+class SectionedTableParser(TableParser):
+    """
+    Parses srsRAN gNB and UE metrics tables:
+    a banner naming each |-separated section (DL, UL, ...) followed by a
+    header row, then whitespace separated values in the same sections
+    Column names are prefixed with their section, e.g. dl_mcs and ul_mcs
+    """
+
+    def __init__(self, prefix: str = ""):
+        super().__init__(prefix)
+        self.sections: Optional[List[str]] = None
+        self.columns: Optional[List[List[str]]] = None
+
+    def parse_table_line(self, line: str) -> Optional[Sample]:
+        if "---" in line:
+            sections = []
+            for group in line.split("|"):
+                match = BANNER_SECTION.search(group)
+                sections.append(match.group(1) if match else "")
+            if any(sections):
+                self.sections = sections
+                self.columns = None
+            return None
+
+        if self.sections is None:
+            return None
+
+        groups = line.split("|")
+        if self.columns is None:
+            self._set_columns(groups)
+            return None
+
+        names = [name for group in self.columns for name in group]
+        if len(groups) == len(self.columns):
+            values = []
+            for group, group_columns in zip(groups, self.columns):
+                group_values = group.split()
+                if len(group_values) != len(group_columns):
+                    return None
+                values.extend(group_values)
+        else:
+            values = line.replace("|", " ").split()
+            if len(values) != len(names):
+                return None
+
+        # Repeated header rows are not samples
+        if values[0].lower() == names[0].split("_")[-1]:
+            return None
+        return self.make_sample(names, values)
+
+    def _set_columns(self, groups: List[str]) -> None:
+        if len(groups) == len(self.sections):
+            self.columns = [
+                [column_name(name, section) for name in group.split()]
+                for group, section in zip(groups, self.sections)
+            ]
+        else:
+            self.columns = [[column_name(name) for name in " ".join(groups).split()]]
+
+        seen = {}
+        for group in self.columns:
+            for i, name in enumerate(group):
+                seen[name] = seen.get(name, 0) + 1
+                if seen[name] > 1:
+                    group[i] = f"{name}_{seen[name]}"
+
+
+class GnbMetricsParser(SectionedTableParser):
+    measurement = "gnb_console_metric"
+    tag_columns = ("pci", "rnti")
+
+
+class UeMetricsParser(SectionedTableParser):
+    measurement = "ue_console_metric"
+    tag_columns = ("signal_rat",)
+
+
+class RuMetricsParser(TableParser):
+    """
+    Parses the srsRAN RU emulator table, one | separated cell per column
+    """
+
+    measurement = "ru_console_metric"
+    tag_columns = ("ru_id",)
+
+    def __init__(self, prefix: str = ""):
+        super().__init__(prefix)
+        self.columns: Optional[List[str]] = None
+
+    def parse_table_line(self, line: str) -> Optional[Sample]:
+        if not line.startswith("|"):
+            return None
+        cells = [cell.strip() for cell in line.strip("|").split("|")]
+        if "TX_TOTAL" in cells and "TIME" in cells:
+            self.columns = [column_name(cell) for cell in cells]
+            return None
+        if self.columns is None or len(cells) != len(self.columns):
+            return None
+        return self.make_sample(self.columns, cells)
+
+
+class MetricsParserRegistry:
+    """
+    Maps parser names to factories and component types to default parsers
+    Processes may override the defaults with a metrics_parsers list
+    """
+
+    def __init__(self):
+        self.factories: Dict[str, Callable[[], TableParser]] = {}
+        self.defaults: Dict[str, List[str]] = {}
+
+    def register(self, name: str, factory: Callable[[], TableParser]) -> None:
+        self.factories[name] = factory
+
+    def set_default(self, component_type: str, parser_names: List[str]) -> None:
+        self.defaults[component_type] = list(parser_names)
+
+    def create(self, process_config: dict) -> List[TableParser]:
+        parser_names = process_config.get(
+            "metrics_parsers", self.defaults.get(process_config.get("type"), [])
+        )
+        parsers = []
+        for name in parser_names:
+            if name not in self.factories:
+                raise RuntimeError(
+                    f"Unknown metrics parser '{name}' for {process_config.get('id')}: "
+                    f"available parsers are {sorted(self.factories)}"
+                )
+            parsers.append(self.factories[name]())
+        if parsers:
+            logging.debug(f"{process_config.get('id')}: metrics parsers {parser_names}")
+        return parsers
+
+
+PARSER_REGISTRY = MetricsParserRegistry()
+PARSER_REGISTRY.register("gnb", GnbMetricsParser)
+PARSER_REGISTRY.register("ue", UeMetricsParser)
+PARSER_REGISTRY.register("ru", RuMetricsParser)
+PARSER_REGISTRY.register("ofh_gnb", lambda: GnbMetricsParser(prefix="[GNB] "))
+PARSER_REGISTRY.register("ofh_ru", lambda: RuMetricsParser(prefix="[RU] "))
+PARSER_REGISTRY.set_default("rtue", ["ue"])
+PARSER_REGISTRY.set_default("ofh_attacker", ["ofh_ru", "ofh_gnb"])
@@ -0,0 +1,92 @@
+import logging
+import threading
+from typing import Any, Dict, List, Tuple
+
+import docker
+from docker.client import DockerClient
+from docker.models.networks import Network
+from docker.types import IPAMConfig, IPAMPool
+from docker.utils import version_gte
+
+# Engine API version from which a container can join several networks at create
+MULTI_NETWORK_API_VERSION = "1.44"
+
+
+class NetworkManager:
+    """
+    Resolves the Docker networks used by components once and caches them,
+    creating missing ones under a lock so concurrent starts never race
+    Containers join their networks at create time through networking_config
+    Cached entries are dropped on network destroy events
+    """
+
+    def __init__(self, docker_client: DockerClient):
+        self.docker_client = docker_client
+        self.networks: Dict[str, Network] = {}
+        self.lock = threading.Lock()
+
+    def get(self, name: str) -> Network:
+        """
+        Returns the network named name, raising docker.errors.NotFound if it does not exist
+        """
+        with self.lock:
+            network = self.networks.get(name)
+            if network is None:
+                network = self.docker_client.networks.get(name)
+                self.networks[name] = network
+            return network
+
+    def ensure(self, name: str, subnet: str, gateway: str) -> Network:
+        """
+        Returns the network named name, creating it as a bridge on subnet if it does not exist
+        """
+        with self.lock:
+            network = self.networks.get(name)
+            if network is not None:
+                return network
+            try:
+                network = self.docker_client.networks.get(name)
+            except docker.errors.NotFound:
+                ipam_config = IPAMConfig(pool_configs=[IPAMPool(subnet=subnet, gateway=gateway)])
+                try:
+                    network = self.docker_client.networks.create(
+                        name=name,
+                        driver="bridge",
+                        ipam=ipam_config,
+                        check_duplicate=True,
+                    )
+                    logging.info(f"Created network {name} on {subnet}")
+                except docker.errors.APIError:
+                    # Another client of the daemon created it first
+                    network = self.docker_client.networks.get(name)
+            self.networks[name] = network
+            return network
+
+    def create_arguments(self, names: List[str]) -> Tuple[Dict[str, Any], List[str]]:
+        """
+        Returns the containers.create arguments attaching the networks in names
+        and the networks still to connect after create, needed only when
+        the daemon predates multi-network create
+        """
+        names = list(dict.fromkeys(names))
+        if not names:
+            return {}, []
+        api = self.docker_client.api
+        if not version_gte(api.api_version, MULTI_NETWORK_API_VERSION):
+            return {"network": names[0]}, names[1:]
+        return {
+            "network": names[0],
+            "networking_config": {name: api.create_endpoint_config() for name in names},
+        }, []
+
+    def handle_event(self, event: dict) -> None:
+        if event.get("Action") != "destroy":
+            return
+        name = event.get("Actor", {}).get("Attributes", {}).get("name", "")
+        with self.lock:
+            if self.networks.pop(name, None) is not None:
+                logging.debug(f"Network {name} removed, dropped from cache")
+
+    def clear(self) -> None:
+        with self.lock:
+            self.networks.clear()
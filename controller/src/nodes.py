@@ -0,0 +1,288 @@
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import docker
+from docker.client import DockerClient
+
+from container_status import ContainerStatusTable
+from docker_events import DockerEventListener
+from image_index import ImageIndex
+from log_multiplexer import LogMultiplexer
+from network_manager import NetworkManager
+
+LOCAL_NODE = "local"
+# Types that always run with the host network stack
+HOST_NETWORK_TYPES = ("ofh_attacker",)
+
+
+class Node:
+    """
+    One Docker daemon processes can be placed on, with its own event stream,
+    image index, network cache, status table and log multiplexer
+    Capacities left undeclared (None) are not limited
+    multiplexer_factory(docker_url, api_version, reconnect_delay_ms=...) creates
+    the log multiplexer, replaceable for testing with fake clients
+    """
+
+    def __init__(
+        self,
+        name: str,
+        docker_client: DockerClient,
+        docker_url: str,
+        cpus: Optional[float] = None,
+        b200_serials: Optional[Iterable[str]] = None,
+        host_network: bool = True,
+        multiplexer_factory: Callable[..., LogMultiplexer] = LogMultiplexer,
+    ):
+        self.name = name
+        self.docker_client = docker_client
+        self.docker_url = docker_url
+        self.cpus = None if cpus is None else float(cpus)
+        self.b200_serials = None if b200_serials is None else [str(serial) for serial in b200_serials]
+        self.host_network = bool(host_network)
+        self.multiplexer_factory = multiplexer_factory
+        self.docker_events: Optional[DockerEventListener] = None
+        self.image_index: Optional[ImageIndex] = None
+        self.network_manager: Optional[NetworkManager] = None
+        self.container_status: Optional[ContainerStatusTable] = None
+        self.log_multiplexer: Optional[LogMultiplexer] = None
+
+    def start(self, event_handlers: Iterable[Callable[[dict], None]] = (), reconnect_delay_ms: int = 1000) -> None:
+        """
+        Starts following the daemon; event_handlers also get its container events
+        """
+        self.docker_events = DockerEventListener(self.docker_client)
+        self.image_index = ImageIndex(self.docker_client)
+        self.docker_events.subscribe("image", self.image_index.handle_event, resync=self.image_index.refresh)
+        self.network_manager = NetworkManager(self.docker_client)
+        self.docker_events.subscribe("network", self.network_manager.handle_event, resync=self.network_manager.clear)
+        self.container_status = ContainerStatusTable(self.docker_client)
+        self.docker_events.subscribe("container", self.container_status.handle_event, resync=self.container_status.refresh)
+        for handler in event_handlers:
+            self.docker_events.subscribe("container", handler)
+        self.docker_events.start()
+        self.image_index.refresh()
+        self.container_status.refresh()
+
+        self.log_multiplexer = self.multiplexer_factory(
+            self.docker_url,
+            self.docker_client.api.api_version,
+            reconnect_delay_ms=reconnect_delay_ms,
+        )
+        self.log_multiplexer.start()
+
+    def stop(self) -> None:
+        if self.docker_events:
+            self.docker_events.stop()
+        if self.log_multiplexer:
+            self.log_multiplexer.stop()
+
+
+def default_client_factory(docker_host: Optional[str]) -> DockerClient:
+    if docker_host is None:
+        return docker.from_env()
+    return docker.DockerClient(base_url=docker_host)
+
+
+def process_requirements(process_config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Capacity a process needs from its node
+    """
+    rf_config = process_config.get("rf") or {}
+    return {
+        "cpus": float(process_config.get("cpus", 1)),
+        "b200": rf_config.get("type") == "b200",
+        "serial": str(rf_config["serial"]) if rf_config.get("serial") else None,
+        "zmq": rf_config.get("type") == "zmq",
+        "host_network": bool(process_config.get("host_network", False))
+        or process_config.get("type") in HOST_NETWORK_TYPES,
+    }
+
+
+class Cluster:
+    """
+    The Docker nodes of the controller and the placement of processes on them
+    Capacity in use is derived from the process registry plus placements
+    not registered yet, so stopping a process needs no bookkeeping
+    ZMQ processes share one node, since rt_zmq is a bridge local to a daemon
+    """
+
+    def __init__(self, nodes: Dict[str, Node], registry):
+        if not nodes:
+            raise RuntimeError("At least one node is required")
+        self.nodes = nodes
+        self.registry = registry
+        self.placing: Dict[str, Dict[str, Any]] = {}
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_config(
+        cls,
+        nodes_options: Optional[Dict[str, Dict[str, Any]]],
+        registry,
+        client_factory: Callable[[str], DockerClient] = None,
+        multiplexer_factory: Callable[..., LogMultiplexer] = LogMultiplexer,
+    ) -> "Cluster":
+        """
+        Builds the nodes declared under the nodes key, or a single local node
+        from the environment when there are none
+        client_factory(docker_host) creates each Docker client, replaceable for
+        testing; docker_host is None for nodes using the environment
+        multiplexer_factory is passed on to every Node
+        """
+        if client_factory is None:
+            client_factory = default_client_factory
+        local_url = os.getenv("DOCKER_HOST", "unix:///var/run/docker.sock")
+        nodes: Dict[str, Node] = {}
+        for name, node_options in (nodes_options or {LOCAL_NODE: {}}).items():
+            node_options = node_options or {}
+            docker_host = node_options.get("docker_host")
+            nodes[name] = Node(
+                name,
+                client_factory(docker_host),
+                docker_host or local_url,
+                cpus=node_options.get("cpus"),
+                b200_serials=node_options.get("b200_serials"),
+                host_network=node_options.get("host_network", True),
+                multiplexer_factory=multiplexer_factory,
+            )
+        return cls(nodes, registry)
+
+    @property
+    def default(self) -> Node:
+        return self.nodes.get(LOCAL_NODE) or next(iter(self.nodes.values()))
+
+    def node(self, name: Optional[str] = None) -> Node:
+        if name is None:
+            return self.default
+        node = self.nodes.get(name)
+        if node is None:
+            raise RuntimeError(f"Unknown node {name}")
+        return node
+
+    def place(
+        self,
+        process_config: Dict[str, Any],
+        preferred: Optional[str] = None,
+        leaving: Iterable[str] = (),
+    ) -> Node:
+        """
+        Chooses the node of a process and records it as process_config["node"]
+        A node already set in the config is required, otherwise the node the
+        process runs on or preferred is kept if it fits, else the fitting node
+        with the most free CPUs is used
+        Processes in leaving are about to stop and their capacity counts as free
+        The placement holds its capacity until settle() or registration
+        """
+        process_id = process_config["id"]
+        needs = process_requirements(process_config)
+        with self.lock:
+            placed = {process_meta["id"]: process_meta["config"] for process_meta in self.registry.snapshot()}
+            current = placed.get(process_id, {}).get("node")
+            placed.update(self.placing)
+            placed.pop(process_id, None)
+            for leaving_id in leaving:
+                placed.pop(leaving_id, None)
+            usage = self._usage(placed.values())
+
+            pinned = process_config.get("node")
+            if pinned is not None:
+                candidates = [self.node(pinned)]
+            else:
+                candidates = list(self.nodes.values())
+            reasons = {node.name: self._misfit(node, needs, usage) for node in candidates}
+            fitting = [node for node in candidates if reasons[node.name] is None]
+            if not fitting:
+                raise RuntimeError(
+                    f"No node can run {process_id}: "
+                    + "; ".join(f"{name} {reason}" for name, reason in reasons.items())
+                )
+
+            node = None
+            for name in (current, preferred):
+                node = next((candidate for candidate in fitting if candidate.name == name), None)
+                if node is not None:
+                    break
+            if node is None:
+                node = max(
+                    fitting,
+                    key=lambda candidate: (
+                        float("inf") if candidate.cpus is None else candidate.cpus - usage[candidate.name]["cpus"],
+                        -usage[candidate.name]["processes"],
+                    ),
+                )
+            process_config["node"] = node.name
+            self.placing[process_id] = process_config
+        logging.debug(f"Placed {process_id} on node {node.name}")
+        return node
+
+    def settle(self, process_ids: Iterable[str]) -> None:
+        """
+        Drops pending placements once the processes are registered or abandoned
+        """
+        with self.lock:
+            for process_id in process_ids:
+                self.placing.pop(process_id, None)
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        with self.lock:
+            placed = [process_meta["config"] for process_meta in self.registry.snapshot()]
+        usage = self._usage(placed)
+        return {
+            name: {
+                "docker_host": node.docker_url,
+                "cpus": node.cpus,
+                "cpus_used": usage[name]["cpus"],
+                "b200_serials": node.b200_serials,
+                "b200_used": usage[name]["b200"] + len(usage[name]["serials"]),
+                "host_network": node.host_network,
+                "processes": usage[name]["processes"],
+            }
+            for name, node in self.nodes.items()
+        }
+
+    def stop(self) -> None:
+        for node in self.nodes.values():
+            node.stop()
+
+    def _usage(self, process_configs: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        usage = {
+            name: {"cpus": 0.0, "b200": 0, "serials": set(), "zmq": False, "processes": 0}
+            for name in self.nodes
+        }
+        for process_config in process_configs:
+            node_usage = usage.get(process_config.get("node") or self.default.name)
+            if node_usage is None:
+                continue
+            needs = process_requirements(process_config)
+            node_usage["cpus"] += needs["cpus"]
+            node_usage["processes"] += 1
+            node_usage["zmq"] = node_usage["zmq"] or needs["zmq"]
+            if needs["serial"]:
+                node_usage["serials"].add(needs["serial"])
+            elif needs["b200"]:
+                node_usage["b200"] += 1
+        return usage
+
+    def _misfit(self, node: Node, needs: Dict[str, Any], usage: Dict[str, Dict[str, Any]]) -> Optional[str]:
+        """
+        Why a process does not fit on a node, None if it does
+        """
+        node_usage = usage[node.name]
+        if needs["host_network"] and not node.host_network:
+            return "does not allow host_network"
+        if node.cpus is not None and node_usage["cpus"] + needs["cpus"] > node.cpus:
+            return f"has {node.cpus - node_usage['cpus']:g} cpus free, {needs['cpus']:g} needed"
+        if needs["b200"] and node.b200_serials is not None:
+            free = len(node.b200_serials) - len(node_usage["serials"]) - node_usage["b200"]
+            if needs["serial"] and (needs["serial"] not in node.b200_serials or needs["serial"] in node_usage["serials"]):
+                return f"does not have B200 {needs['serial']} free"
+            if free < 1:
+                return "has no free B200"
+        if needs["zmq"]:
+            zmq_nodes = [name for name, other_usage in usage.items() if name != node.name and other_usage["zmq"]]
+            if zmq_nodes:
+                return f"is not the ZMQ node {zmq_nodes[0]}"
+        return None
@@ -2,9 +2,9 @@ from worker_thread import WorkerThread
 import os
 
 class ofh_attacker(WorkerThread):
-    def start(self):
-        self.config.image_name = "ghcr.io/oran-testing/ofh"
-        self.cleanup_old_containers()
+    image_name = "ghcr.io/oran-testing/ofh"
+
+    def prepare(self):
         self.setup_env()
         self.setup_networks()
 
@@ -21,4 +21,3 @@ class ofh_attacker(WorkerThread):
         self.config.host_network = True 
 
         self.setup_volumes()
-        self.start_container()
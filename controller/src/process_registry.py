@@ -0,0 +1,92 @@
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class ProcessRegistry:
+    """
+    Running processes indexed by id and by API token
+    Every mutation holds the lock; iteration works on snapshots so handlers
+    never see a half-updated registry
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.by_id: Dict[str, Dict[str, Any]] = {}
+        self.by_token: Dict[str, Tuple[str, List[str]]] = {}
+        self.reserved = set()
+
+    def __len__(self) -> int:
+        with self.lock:
+            return len(self.by_id)
+
+    def __contains__(self, process_id: str) -> bool:
+        with self.lock:
+            return process_id in self.by_id
+
+    def reserve(self, process_id: str) -> bool:
+        """
+        Claims an id before its process exists, False if already taken
+        Keeps two concurrent /start requests from using the same id
+        """
+        with self.lock:
+            if process_id in self.by_id or process_id in self.reserved:
+                return False
+            self.reserved.add(process_id)
+            return True
+
+    def release(self, process_id: str) -> None:
+        with self.lock:
+            self.reserved.discard(process_id)
+
+    def add(self, process_meta: Dict[str, Any]) -> None:
+        """
+        Registers a process entry (id, type, config, handle, token)
+        An id reserved by the caller is taken over by the entry
+        """
+        process_id = process_meta["id"]
+        with self.lock:
+            if process_id in self.by_id:
+                raise RuntimeError(f"Process {process_id} already registered")
+            for token in process_meta["token"]:
+                if token and token in self.by_token:
+                    raise RuntimeError(f"Token of {process_id} already registered")
+            self.reserved.discard(process_id)
+            self.by_id[process_id] = process_meta
+            for token, permissions in process_meta["token"].items():
+                if token:
+                    self.by_token[token] = (process_id, permissions)
+
+    def remove(self, process_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Unregisters a process and returns its entry, None if it was not registered
+        Only one of several concurrent callers gets the entry
+        """
+        with self.lock:
+            process_meta = self.by_id.pop(process_id, None)
+            if process_meta is None:
+                return None
+            for token in process_meta["token"]:
+                if token and self.by_token.get(token, (None,))[0] == process_id:
+                    del self.by_token[token]
+            return process_meta
+
+    def get(self, process_id: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            return self.by_id.get(process_id)
+
+    def permissions_for(self, token: str) -> Optional[List[str]]:
+        """
+        Returns the permissions granted to a token, None for unknown tokens
+        """
+        if not token:
+            return None
+        with self.lock:
+            entry = self.by_token.get(token)
+        return None if entry is None else entry[1]
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """
+        Returns the process entries in registration order
+        """
+        with self.lock:
+            return list(self.by_id.values())
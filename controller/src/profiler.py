@@ -0,0 +1,160 @@
+import linecache
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of every thread at a fixed interval through
+    sys._current_frames and aggregates them as collapsed stacks
+    (thread;outermost;...;innermost count), ready for flamegraph.pl or speedscope
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.sampler_thread: Optional[threading.Thread] = None
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started = 0.0
+        self.elapsed = 0.0
+        self.result: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self.sampler_thread is not None and self.sampler_thread.is_alive()
+
+    def start(self, interval_ms: float = 10, duration_s: Optional[float] = None) -> bool:
+        """
+        Starts sampling, False if a profile is already running
+        With duration_s the profile stops on its own and is kept for stop()
+        """
+        with self.lock:
+            if self.running:
+                return False
+            self.stacks = Counter()
+            self.samples = 0
+            self.result = None
+            self.stop_event.clear()
+            self.started = time.monotonic()
+            self.sampler_thread = threading.Thread(
+                target=self._sample_loop,
+                args=(max(1.0, float(interval_ms)) / 1000.0, duration_s),
+                name="profiler",
+                daemon=True,
+            )
+            self.sampler_thread.start()
+            return True
+
+    def stop(self) -> Optional[str]:
+        """
+        Stops sampling and returns the collapsed stacks of the last profile,
+        None if no profile was taken
+        """
+        self.stop_event.set()
+        if self.sampler_thread:
+            self.sampler_thread.join()
+        with self.lock:
+            return self.result
+
+    def _sample_loop(self, interval: float, duration_s: Optional[float]) -> None:
+        own_id = threading.get_ident()
+        deadline = self.started + duration_s if duration_s else None
+        while not self.stop_event.wait(interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+            if deadline and time.monotonic() >= deadline:
+                break
+        self.elapsed = time.monotonic() - self.started
+        with self.lock:
+            header = f"# {self.samples} samples over {self.elapsed:.1f}s\n"
+            self.result = header + "".join(
+                f"{stack} {count}\n" for stack, count in self.stacks.most_common()
+            )
+
+
+class AllocationProfiler:
+    """
+    Traces allocations with tracemalloc between start and stop and reports
+    the sites that grew the most
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.baseline: Optional[tracemalloc.Snapshot] = None
+        self.timer: Optional[threading.Timer] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.top = 25
+
+    @property
+    def running(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int = 25, duration_s: Optional[float] = None, top: int = 25) -> bool:
+        with self.lock:
+            if tracemalloc.is_tracing():
+                return False
+            self.result = None
+            self.top = int(top)
+            tracemalloc.start(max(1, int(frames)))
+            self.baseline = tracemalloc.take_snapshot()
+            if duration_s:
+                self.timer = threading.Timer(float(duration_s), self.stop)
+                self.timer.daemon = True
+                self.timer.start()
+            return True
+
+    def stop(self, top: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Stops tracing and returns the top allocation sites by growth since start,
+        or the result of the last trace if none is running
+        """
+        with self.lock:
+            if self.timer:
+                self.timer.cancel()
+                self.timer = None
+            if not tracemalloc.is_tracing():
+                return self.result
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, linecache.__file__)]
+            snapshot = snapshot.filter_traces(filters)
+            baseline = self.baseline.filter_traces(filters)
+            self.baseline = None
+
+            sites: List[Dict[str, Any]] = []
+            for stat in snapshot.compare_to(baseline, "traceback")[: top or self.top]:
+                sites.append({
+                    "size_kb": round(stat.size / 1024, 1),
+                    "size_diff_kb": round(stat.size_diff / 1024, 1),
+                    "count": stat.count,
+                    "count_diff": stat.count_diff,
+                    "traceback": [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback],
+                })
+            self.result = {
+                "traced_kb": round(current / 1024, 1),
+                "peak_kb": round(peak / 1024, 1),
+                "top": sites,
+            }
+            return self.result
+
+
+CPU_PROFILER = SamplingProfiler()
+ALLOCATION_PROFILER = AllocationProfiler()
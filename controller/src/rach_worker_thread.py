@@ -6,10 +6,10 @@ import uuid
 import configparser
 import docker
 import logging
-from datetime import datetime
 
-from influxdb_client import InfluxDBClient, WriteApi
-from influxdb_client.client.write_api import SYNCHRONOUS
+from influxdb_client import InfluxDBClient, Point, WritePrecision
+
+from globals import Config
 
 class rach_agent:
     def __init__(self, influxdb_client, docker_client):
@@ -27,13 +27,7 @@ class rach_agent:
         self.image_name = "ghcr.io/oran-testing/jammer" # change the image name
 
         # Verify Image
-        image_exists = False
-        for img in self.docker_client.images.list():
-            image_tags = [image_tag.split(':')[0] for image_tag in img.tags]
-            if self.image_name in image_tags:
-                image_exists = True
-                break
-        if not image_exists:
+        if not Config.image_index.contains(self.image_name):
             raise RuntimeError(f"Required Docker image {self.image_name} not found: Please run 'sudo docker compose --profile components build' or 'sudo docker compose --profile components pull'")
 
         # Remove old container
@@ -92,14 +86,14 @@ class rach_agent:
         self.log_thread.start()
 
 
-    def stop(self):
+    def stop(self, timeout=None):
         """
         Stops jammer cotainer if existing
         Stops log reporting thread
         """
         if self.docker_container:
             try:
-                self.docker_container.stop()
+                self.docker_container.stop(timeout=timeout)
                 self.docker_container.remove()
                 logging.info(f"Docker container stopped and removed: {self.docker_container.name}")
             except docker.errors.APIError as e:
@@ -108,37 +102,23 @@ class rach_agent:
 
 
     def send_message(self, message_text):
-        with self.influxdb_client.write_api(write_options=SYNCHRONOUS) as write_api:
-            try:
-                utc_timestamp = datetime.utcnow()
-                formatted_timestamp = utc_timestamp.strftime("%Y-%m-%dT%H:%M:%SZ")
-                self.influx_push(write_api, bucket='rtusystem', record_time_key="time", 
-                            record={
-                                "measurement": "jammer_log",
-                                "tags": {
-                                    "testbed": "default",
-                                    "jammer_data_identifier": self.container_name,
-                                },
-                            "fields": {"jammer_stdout_log": message_text},
-                            "time": formatted_timestamp,
-                            },
-                            )
-                logging.debug(f"[{self.container_name}]: {message_text}")
-            except Exception as e:
-                logging.error(f"send_message failed with error: {e}")
-
-    def influx_push(self, write_api: WriteApi, *args, **kwargs) -> None:
-        while True:
-            try:
-                write_api.write(*args, **kwargs)
-                break
-            except ConnectionError as e:
-                logging.warning(f"Error pushing data: {e}. Retrying...")
-                time.sleep(1)
+        point = (
+            Point("jammer_log")
+            .tag("testbed", "default")
+            .tag("jammer_data_identifier", self.container_name)
+            .field("jammer_stdout_log", message_text)
+            .time(time.time_ns(), WritePrecision.NS)
+        )
+        if not Config.log_writer.submit(self.container_name, point.to_line_protocol()):
+            logging.debug(f"[{self.container_name}]: log queue full, line dropped")
+            return
+        logging.debug(f"[{self.container_name}]: {message_text}")
 
     def log_report_thread(self):
         while not self.stop_thread.is_set():
             line = next(self.docker_logs, None)
+            if line is None:
+                break
             if not line:
                 continue
             if isinstance(line, bytes):
@@ -0,0 +1,211 @@
+import logging
+import re
+import socket
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+DEFAULT_TIMEOUT_MS = 60000
+DEFAULT_INTERVAL_MS = 250
+
+
+class ReadinessProbe:
+    """
+    One readiness condition of a process
+    Log probes are fed lines from the live log stream, polled probes
+    are checked every interval while someone waits on them
+    """
+
+    description = ""
+
+    def reset(self) -> None:
+        pass
+
+    def observe(self, line: str) -> bool:
+        return False
+
+    def poll(self) -> bool:
+        return False
+
+
+class LogProbe(ReadinessProbe):
+    def __init__(self, pattern: str):
+        self.pattern = re.compile(pattern)
+        self.description = f"log matches /{pattern}/"
+        self.matched = False
+
+    def reset(self) -> None:
+        self.matched = False
+
+    def observe(self, line: str) -> bool:
+        if not self.matched and self.pattern.search(line):
+            self.matched = True
+        return self.matched
+
+    def poll(self) -> bool:
+        return self.matched
+
+
+class TcpProbe(ReadinessProbe):
+    """
+    Ready once a TCP connection succeeds, which also covers ZMQ endpoints
+    """
+
+    def __init__(self, host: str, port: int, connect_timeout: float = 1.0):
+        self.host = host
+        self.port = int(port)
+        self.connect_timeout = connect_timeout
+        self.description = f"tcp {host}:{port} open"
+
+    def poll(self) -> bool:
+        try:
+            with socket.create_connection((self.host, self.port), timeout=self.connect_timeout):
+                return True
+        except OSError:
+            return False
+
+
+class HealthProbe(ReadinessProbe):
+    """
+    Ready once the container's Docker HEALTHCHECK reports healthy
+    """
+
+    description = "container healthy"
+
+    def __init__(self, handle):
+        self.handle = handle
+
+    def poll(self) -> bool:
+        container = self.handle.docker_container
+        if container is None:
+            return False
+        try:
+            container.reload()
+        except Exception:
+            return False
+        health = container.attrs.get("State", {}).get("Health") or {}
+        return health.get("Status") == "healthy"
+
+
+class Readiness:
+    """
+    All probes of one process; the process is ready once every probe passes
+    """
+
+    def __init__(
+        self,
+        probes: List[ReadinessProbe],
+        timeout_ms: int = DEFAULT_TIMEOUT_MS,
+        interval_ms: int = DEFAULT_INTERVAL_MS,
+    ):
+        self.probes = probes
+        self.timeout = max(0, int(timeout_ms)) / 1000.0
+        self.interval = max(1, int(interval_ms)) / 1000.0
+        self.passed = [False] * len(probes)
+        self.condition = threading.Condition()
+
+    def reset(self) -> None:
+        with self.condition:
+            for probe in self.probes:
+                probe.reset()
+            self.passed = [False] * len(self.probes)
+
+    def mark_ready(self) -> None:
+        """
+        Marks every probe passed, for processes known to be up already
+        """
+        with self.condition:
+            self.passed = [True] * len(self.probes)
+            self.condition.notify_all()
+
+    def is_ready(self) -> bool:
+        with self.condition:
+            return all(self.passed)
+
+    def observe(self, line: str) -> None:
+        """
+        Called for every log line until the process is ready
+        """
+        with self.condition:
+            changed = False
+            for i, probe in enumerate(self.probes):
+                if not self.passed[i] and probe.observe(line):
+                    self.passed[i] = True
+                    changed = True
+            if changed:
+                self.condition.notify_all()
+
+    def pending(self) -> List[str]:
+        with self.condition:
+            return [
+                probe.description
+                for probe, passed in zip(self.probes, self.passed)
+                if not passed
+            ]
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Blocks until every probe passed or the timeout expired
+        """
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        while True:
+            with self.condition:
+                polled = [
+                    (i, probe)
+                    for i, probe in enumerate(self.probes)
+                    if not self.passed[i]
+                ]
+            # Polled probes may block on the network, so run them unlocked
+            results = [(i, probe.poll()) for i, probe in polled]
+            with self.condition:
+                for i, passed in results:
+                    self.passed[i] = self.passed[i] or passed
+                if all(self.passed):
+                    return True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self.condition.wait(min(self.interval, remaining))
+
+
+def build_readiness(readiness_config: Optional[Dict[str, Any]], handle) -> Optional[Readiness]:
+    """
+    Builds the probes declared in a process readiness section:
+    log (regex), tcp ("host:port" or {host, port}), health (bool),
+    timeout_ms and interval_ms
+    """
+    if not readiness_config:
+        return None
+
+    probes: List[ReadinessProbe] = []
+    if "log" in readiness_config:
+        try:
+            probes.append(LogProbe(readiness_config["log"]))
+        except re.error as e:
+            raise RuntimeError(f"Invalid readiness log pattern for {handle.config.container_id}: {e}")
+
+    if "tcp" in readiness_config:
+        tcp_config = readiness_config["tcp"]
+        if isinstance(tcp_config, dict):
+            host = tcp_config.get("host", handle.config.container_id)
+            port = tcp_config.get("port")
+        else:
+            host, _, port = str(tcp_config).rpartition(":")
+            host = host or handle.config.container_id
+        if not port:
+            raise RuntimeError(f"Readiness tcp probe for {handle.config.container_id} requires a port")
+        probes.append(TcpProbe(host, int(port)))
+
+    if readiness_config.get("health", False):
+        probes.append(HealthProbe(handle))
+
+    if not probes:
+        raise RuntimeError(f"Readiness for {handle.config.container_id} declares no probes: use log, tcp or health")
+
+    logging.debug(f"{handle.config.container_id}: readiness probes {[probe.description for probe in probes]}")
+    return Readiness(
+        probes,
+        timeout_ms=readiness_config.get("timeout_ms", DEFAULT_TIMEOUT_MS),
+        interval_ms=readiness_config.get("interval_ms", DEFAULT_INTERVAL_MS),
+    )
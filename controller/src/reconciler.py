@@ -0,0 +1,229 @@
+import copy
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import yaml
+
+from globals import Config, Globals
+from shutdown import ShutdownCoordinator
+from startup_scheduler import StartupScheduler, dependency_order
+
+
+class Reconciler:
+    """
+    Applies changes to the processes list of the controller config while running
+    New processes are diffed against the registry by config hash: only added,
+    removed or changed processes are started, stopped or restarted, in parallel
+    Runs on request (SIGHUP) and when the config file changes
+    Processes started through the API are left alone
+    """
+
+    def __init__(
+        self,
+        config_path: str,
+        build_process: Callable[..., Dict[str, Any]],
+        start_process: Callable[[Dict[str, Any]], None],
+        max_concurrency: int = 4,
+        poll_interval_ms: int = 2000,
+        watch: bool = True,
+    ):
+        self.config_path = str(config_path)
+        self.build_process = build_process
+        self.start_process = start_process
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.poll_interval = max(1, int(poll_interval_ms)) / 1000.0
+        self.watch = watch
+        self.requested = threading.Event()
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()
+        self.watch_thread: Optional[threading.Thread] = None
+        self.mtime = self._mtime()
+
+    def start(self) -> None:
+        self.watch_thread = threading.Thread(target=self._watch_loop, name="reconciler", daemon=True)
+        self.watch_thread.start()
+
+    def stop(self) -> None:
+        self.stop_event.set()
+        self.requested.set()
+
+    def request(self) -> None:
+        """
+        Schedules a reconcile on the reconciler thread, safe to call from signal handlers
+        """
+        self.requested.set()
+
+    def reconcile(self) -> Optional[Dict[str, List[str]]]:
+        """
+        Reads the config file and converges the registry to its processes list
+        Returns the ids started, stopped, restarted and left unchanged,
+        None if the new config was rejected
+        """
+        with self.lock:
+            if Globals.shutting_down:
+                return None
+            reconcile_began = time.monotonic()
+            desired = self._load()
+            if desired is None:
+                return None
+            placed = list(desired)
+            try:
+                return self._apply(desired, reconcile_began)
+            finally:
+                Config.cluster.settle(placed)
+
+    def _apply(self, desired: Dict[str, Dict[str, Any]], reconcile_began: float) -> Dict[str, List[str]]:
+        registry = Globals.process_registry
+        current = {
+            process_meta["id"]: process_meta
+            for process_meta in registry.snapshot()
+            if process_meta.get("source", "config") == "config"
+        }
+        for process_id in list(desired):
+            if process_id not in current and process_id in registry:
+                logging.error(f"Config reload: {process_id} is already used by a component started through the API")
+                del desired[process_id]
+
+        removed = [process_id for process_id in current if process_id not in desired]
+        changed = [
+            process_id for process_id in desired
+            if process_id in current and current[process_id]["config_hash"] != desired[process_id]["config_hash"]
+        ]
+        added = [process_id for process_id in desired if process_id not in current]
+        unchanged = [process_id for process_id in desired if process_id in current and process_id not in changed]
+
+        self._stop([current[process_id] for process_id in removed + changed])
+        failed = self._start([desired[process_id] for process_id in changed + added])
+        Config.options["processes"] = [process_meta["config"] for process_meta in desired.values()]
+
+        summary = {
+            "started": [process_id for process_id in added if process_id not in failed],
+            "stopped": removed,
+            "restarted": [process_id for process_id in changed if process_id not in failed],
+            "failed": failed,
+            "unchanged": unchanged,
+        }
+        logging.info(
+            f"Config reloaded in {time.monotonic() - reconcile_began:.3f}s: "
+            + ", ".join(f"{key} {len(ids)}" for key, ids in summary.items())
+        )
+        for key in ("started", "stopped", "restarted", "failed"):
+            if summary[key]:
+                logging.info(f"Config reload {key}: {', '.join(summary[key])}")
+        return summary
+
+    def _load(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Builds the registry entries of the new processes list, None if the
+        file cannot be used; nothing is changed in that case
+        """
+        try:
+            with open(self.config_path, "r") as file:
+                options = yaml.safe_load(file) or {}
+            process_configs = copy.deepcopy(options.get("processes", []) or [])
+        except (OSError, yaml.YAMLError, AttributeError) as e:
+            logging.error(f"Config reload rejected: {e}")
+            return None
+
+        # Capacity of processes about to be removed is free for the new ones
+        new_ids = {process_config.get("id") for process_config in process_configs if isinstance(process_config, dict)}
+        leaving = [
+            process_meta["id"]
+            for process_meta in Globals.process_registry.snapshot()
+            if process_meta.get("source", "config") == "config" and process_meta["id"] not in new_ids
+        ]
+        desired: Dict[str, Dict[str, Any]] = {}
+        try:
+            for process_config in process_configs:
+                process_meta = self.build_process(process_config, leaving=leaving)
+                if process_meta["id"] in desired:
+                    raise RuntimeError(f"Duplicate process id {process_meta['id']}")
+                desired[process_meta["id"]] = process_meta
+            dependency_order(list(desired.values()))
+        except (RuntimeError, KeyError, AttributeError, TypeError) as e:
+            logging.error(f"Config reload rejected: {e}")
+            Config.cluster.settle(desired)
+            return None
+        return desired
+
+    def _stop(self, process_metadata: List[Dict[str, Any]]) -> None:
+        for process_meta in process_metadata:
+            Globals.process_registry.remove(process_meta["id"])
+        ShutdownCoordinator(
+            Config.options.get("stop_grace_s", {}),
+            self.max_concurrency,
+        ).run(process_metadata)
+        for process_meta in process_metadata:
+            container_status = process_meta["handle"].config.container_status
+            if container_status:
+                container_status.forget(process_meta["id"])
+
+    def _start(self, process_metadata: List[Dict[str, Any]]) -> List[str]:
+        """
+        Starts the given processes in dependency order, registering each one
+        as its start is scheduled so a shutdown meanwhile stops it too
+        Dependencies on processes already running are satisfied
+        Returns the ids that failed to start
+        """
+        starting = {process_meta["id"] for process_meta in process_metadata}
+        by_id = {process_meta["id"]: process_meta for process_meta in process_metadata}
+        schedule = [
+            dict(process_meta, config=dict(
+                process_meta["config"],
+                depends_on=[
+                    dependency
+                    for dependency in (process_meta["config"].get("depends_on", []) or [])
+                    if dependency in starting
+                ],
+            ))
+            for process_meta in process_metadata
+        ]
+        started = set()
+
+        def start(scheduled_meta):
+            process_meta = by_id[scheduled_meta["id"]]
+            Globals.process_registry.add(process_meta)
+            try:
+                self.start_process(scheduled_meta)
+            except Exception:
+                Globals.process_registry.remove(process_meta["id"])
+                process_meta["handle"].stop()
+                raise
+            started.add(process_meta["id"])
+
+        try:
+            StartupScheduler(self.max_concurrency).run(schedule, start)
+        except RuntimeError as e:
+            logging.error(f"Config reload: {e}")
+        return sorted(starting - started)
+
+    def _mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.config_path).st_mtime
+        except OSError:
+            return None
+
+    def _watch_loop(self) -> None:
+        pending_change = False
+        while not self.stop_event.is_set():
+            requested = self.requested.wait(self.poll_interval)
+            if self.stop_event.is_set():
+                return
+            if self.watch:
+                mtime = self._mtime()
+                if mtime != self.mtime:
+                    # Wait for one quiet interval so a file still being written is not read
+                    self.mtime = mtime
+                    pending_change = True
+                    if not requested:
+                        continue
+            if requested or pending_change:
+                self.requested.clear()
+                pending_change = False
+                try:
+                    self.reconcile()
+                except Exception as e:
+                    logging.error(f"Config reload failed: {e}")
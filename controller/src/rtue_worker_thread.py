@@ -7,15 +7,13 @@ from worker_thread import WorkerThread
 
 
 class rtue(WorkerThread):
-    def start(self):
-        self.config.image_name = "ghcr.io/oran-testing/rtue"
-        self.cleanup_old_containers()
+    image_name = "ghcr.io/oran-testing/rtue"
+
+    def prepare(self):
         self.setup_env()
         self.setup_networks()
         self.config.container_volumes[self.config.config_file] = {"bind": "/ue.conf", "mode": "ro"}
         self.setup_volumes()
 
-        self.start_container()
-
 
 
@@ -0,0 +1,59 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from startup_scheduler import dependency_order
+
+
+class ShutdownCoordinator:
+    """
+    Stops processes concurrently in reverse dependency order: a process is
+    only stopped once every process depending on it has stopped
+    Each container gets the grace period of its type before Docker kills it
+    """
+
+    def __init__(self, grace_periods: Optional[Dict[str, float]] = None, max_concurrency: int = 16):
+        self.grace_periods = dict(grace_periods or {})
+        self.max_concurrency = max(1, int(max_concurrency))
+
+    def grace_period(self, process_type: str) -> Optional[float]:
+        return self.grace_periods.get(process_type, self.grace_periods.get("default"))
+
+    def run(self, process_metadata: List[Dict[str, Any]]) -> Dict[str, float]:
+        """
+        Stops every process and returns the stop duration of each in seconds
+        """
+        present = {process_meta["id"] for process_meta in process_metadata}
+        # Dependencies may already have been stopped through the API
+        trimmed = [
+            {
+                "id": process_meta["id"],
+                "config": {
+                    "depends_on": [
+                        dependency
+                        for dependency in (process_meta.get("config", {}).get("depends_on", []) or [])
+                        if dependency in present
+                    ]
+                },
+            }
+            for process_meta in process_metadata
+        ]
+        by_id = {process_meta["id"]: process_meta for process_meta in process_metadata}
+        durations: Dict[str, float] = {}
+
+        def stop(process_id):
+            process_meta = by_id[process_id]
+            began = time.monotonic()
+            try:
+                process_meta["handle"].stop(self.grace_period(process_meta["type"]))
+            except Exception as e:
+                logging.error(f"Failed to stop {process_id}: {e}")
+            durations[process_id] = time.monotonic() - began
+            logging.debug(f"Stopped process {process_id} in {durations[process_id]:.3f}s")
+
+        levels = dependency_order(trimmed)
+        with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="shutdown") as executor:
+            for level in reversed(levels):
+                list(executor.map(stop, level))
+        return durations
@@ -0,0 +1,168 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import List, Optional, Tuple
+
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".wal"
+
+
+class SpillQueue:
+    """
+    Append-only, segmented write-ahead log for records that could not be written
+    Records are (component_id, line_protocol) pairs stored one JSON array per line
+    Segments are replayed oldest first and deleted once written
+    The oldest segments are discarded when the size cap is exceeded
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_max_bytes: int = 16 * 1024 * 1024,
+        max_bytes: int = 1024 * 1024 * 1024,
+        fsync_interval_ms: int = 1000,
+    ):
+        self.directory = directory
+        self.segment_max_bytes = max(1, int(segment_max_bytes))
+        self.max_bytes = max(self.segment_max_bytes, int(max_bytes))
+        self.fsync_interval = max(0, int(fsync_interval_ms)) / 1000.0
+        self.lock = threading.Lock()
+        self.active_file = None
+        self.active_path: Optional[str] = None
+        self.active_bytes = 0
+        self.last_fsync = time.monotonic()
+        self.dropped_records = 0
+
+        os.makedirs(self.directory, exist_ok=True)
+        self.next_sequence = 0
+        for path in self._segments():
+            self.next_sequence = max(self.next_sequence, self._sequence(path) + 1)
+
+    def append(self, records: List[Tuple[str, str]]) -> None:
+        if not records:
+            return
+        payload = "".join(json.dumps(record) + "\n" for record in records).encode("utf-8")
+        with self.lock:
+            if self.active_file and self.active_bytes >= self.segment_max_bytes:
+                self._seal()
+            if not self.active_file:
+                self._open_segment()
+            self.active_file.write(payload)
+            self.active_bytes += len(payload)
+            if time.monotonic() - self.last_fsync >= self.fsync_interval:
+                self._fsync()
+            self._enforce_cap()
+
+    def sync(self) -> None:
+        with self.lock:
+            if self.active_file:
+                self._fsync()
+
+    def is_empty(self) -> bool:
+        with self.lock:
+            return not self._segments()
+
+    def pop_segment(self) -> Optional[Tuple[str, List[Tuple[str, str]]]]:
+        """
+        Returns the oldest segment path and its records, sealing the active
+        segment first when it is the only one left
+        The segment is only removed once commit() is called with its path
+        """
+        with self.lock:
+            segments = self._segments()
+            if not segments:
+                return None
+            if segments[0] == self.active_path:
+                self._seal()
+            path = segments[0]
+
+        records = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    component_id, line_protocol = json.loads(line)
+                except (ValueError, TypeError):
+                    # A torn final write after a crash is skipped
+                    logging.warning(f"Skipping corrupt spill record in {path}")
+                    continue
+                records.append((component_id, line_protocol))
+        return path, records
+
+    def commit(self, path: str) -> None:
+        with self.lock:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def spill_bytes(self) -> int:
+        with self.lock:
+            return sum(self._size(path) for path in self._segments())
+
+    def replay_lag(self) -> float:
+        """
+        Seconds since the oldest unreplayed record was spilled
+        """
+        with self.lock:
+            segments = self._segments()
+        if not segments:
+            return 0.0
+        return max(0.0, (time.time_ns() - self._created_ns(segments[0])) / 1e9)
+
+    def close(self) -> None:
+        with self.lock:
+            if self.active_file:
+                self._seal()
+
+    def _open_segment(self) -> None:
+        name = f"{SEGMENT_PREFIX}{self.next_sequence:012d}-{time.time_ns()}{SEGMENT_SUFFIX}"
+        self.next_sequence += 1
+        self.active_path = os.path.join(self.directory, name)
+        self.active_file = open(self.active_path, "ab")
+        self.active_bytes = 0
+
+    def _seal(self) -> None:
+        self._fsync()
+        self.active_file.close()
+        self.active_file = None
+        self.active_path = None
+        self.active_bytes = 0
+
+    def _fsync(self) -> None:
+        self.active_file.flush()
+        os.fsync(self.active_file.fileno())
+        self.last_fsync = time.monotonic()
+
+    def _enforce_cap(self) -> None:
+        segments = self._segments()
+        total = sum(self._size(path) for path in segments)
+        for path in segments:
+            if total <= self.max_bytes or path == self.active_path:
+                break
+            size = self._size(path)
+            with open(path, "rb") as f:
+                self.dropped_records += sum(1 for _ in f)
+            os.remove(path)
+            total -= size
+            logging.warning(f"Spill queue over {self.max_bytes} bytes: discarded {path}")
+
+    def _segments(self) -> List[str]:
+        return sorted(
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory)
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)
+        )
+
+    def _sequence(self, path: str) -> int:
+        return int(os.path.basename(path)[len(SEGMENT_PREFIX):].split("-")[0])
+
+    def _created_ns(self, path: str) -> int:
+        return int(os.path.basename(path)[:-len(SEGMENT_SUFFIX)].split("-")[2])
+
+    def _size(self, path: str) -> int:
+        try:
+            return os.path.getsize(path)
+        except FileNotFoundError:
+            return 0
@@ -0,0 +1,114 @@
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List
+
+
+def dependency_order(process_metadata: List[Dict[str, Any]]) -> List[List[str]]:
+    """
+    Groups process ids into levels where every process only depends on
+    processes of earlier levels
+    Raises RuntimeError on unknown dependencies or cycles
+    """
+    dependencies = {}
+    for process_meta in process_metadata:
+        depends_on = list(process_meta["config"].get("depends_on", []) or [])
+        dependencies[process_meta["id"]] = depends_on
+
+    for process_id, depends_on in dependencies.items():
+        for dependency in depends_on:
+            if dependency not in dependencies:
+                raise RuntimeError(f"Did not find dependent process '{dependency}' for '{process_id}'")
+
+    levels = []
+    placed = set()
+    remaining = dict(dependencies)
+    while remaining:
+        level = [
+            process_id
+            for process_id, depends_on in remaining.items()
+            if all(dependency in placed for dependency in depends_on)
+        ]
+        if not level:
+            raise RuntimeError(f"Dependency cycle between processes: {', '.join(sorted(remaining))}")
+        for process_id in level:
+            del remaining[process_id]
+        placed.update(level)
+        levels.append(level)
+    return levels
+
+
+class StartupScheduler:
+    """
+    Starts processes concurrently, each one as soon as all of its
+    depends_on processes are ready, with at most max_concurrency starting at once
+    """
+
+    def __init__(self, max_concurrency: int = 4):
+        self.max_concurrency = max(1, int(max_concurrency))
+
+    def run(
+        self,
+        process_metadata: List[Dict[str, Any]],
+        start: Callable[[Dict[str, Any]], None],
+    ) -> Dict[str, float]:
+        """
+        Calls start(process_meta) for every entry in dependency order
+        start must only return once the process is ready for its dependents
+        Returns the start latency of each process in seconds
+        """
+        dependency_order(process_metadata)
+
+        by_id = {process_meta["id"]: process_meta for process_meta in process_metadata}
+        waiting_on = {
+            process_id: set(process_meta["config"].get("depends_on", []) or [])
+            for process_id, process_meta in by_id.items()
+        }
+        latencies: Dict[str, float] = {}
+        failures: Dict[str, Exception] = {}
+        startup_began = time.monotonic()
+
+        def timed_start(process_meta):
+            began = time.monotonic()
+            start(process_meta)
+            return time.monotonic() - began
+
+        with ThreadPoolExecutor(
+            max_workers=self.max_concurrency, thread_name_prefix="startup"
+        ) as executor:
+            running = {}
+
+            def submit_ready():
+                for process_id in list(waiting_on):
+                    if not waiting_on[process_id]:
+                        del waiting_on[process_id]
+                        running[executor.submit(timed_start, by_id[process_id])] = process_id
+
+            submit_ready()
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    process_id = running.pop(future)
+                    try:
+                        latencies[process_id] = future.result()
+                    except Exception as e:
+                        logging.error(f"Failed to start {process_id}: {e}")
+                        failures[process_id] = e
+                        continue
+                    logging.info(f"Started {process_id} in {latencies[process_id]:.3f}s")
+                    for dependencies in waiting_on.values():
+                        dependencies.discard(process_id)
+                if not failures:
+                    submit_ready()
+
+        if failures:
+            blocked = sorted(waiting_on)
+            message = "; ".join(f"{process_id}: {e}" for process_id, e in failures.items())
+            if blocked:
+                message += f" (not started: {', '.join(blocked)})"
+            raise RuntimeError(f"Failed to start processes: {message}")
+
+        logging.info(
+            f"Started {len(latencies)} processes in {time.monotonic() - startup_began:.3f}s"
+        )
+        return latencies
@@ -0,0 +1,144 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+import docker
+from docker.client import DockerClient
+
+STATE_FILE = "/host/.generated/controller_state.json"
+
+
+def host_to_local(path: str) -> str:
+    """
+    Translates a host path under the system directory to the controller's /host mount
+    """
+    system_directory = os.getenv("DOCKER_SYSTEM_DIRECTORY")
+    if system_directory and path.startswith(system_directory):
+        return "/host" + path[len(system_directory):]
+    return path
+
+
+def config_hash(process_config: Dict[str, Any]) -> str:
+    """
+    Hash of a process config and the content of its config file,
+    so editing the file changes the hash too
+    """
+    digest = hashlib.sha256(json.dumps(process_config, sort_keys=True, default=str).encode("utf-8"))
+    config_file = process_config.get("config_file")
+    if config_file:
+        try:
+            with open(host_to_local(config_file), "rb") as f:
+                digest.update(f.read())
+        except OSError:
+            pass
+    return digest.hexdigest()
+
+
+def adoptable_container(docker_client: DockerClient, entry: Dict[str, Any]):
+    """
+    Returns the container recorded in a state entry if it is still running
+    under the process id, None otherwise
+    """
+    container_id = entry.get("container_id")
+    if not container_id:
+        return None
+    try:
+        container = docker_client.containers.get(container_id)
+    except docker.errors.NotFound:
+        return None
+    if container.status != "running" or container.name != entry["id"]:
+        return None
+    return container
+
+
+class StateStore:
+    """
+    Persists the process registry (ids, configs, tokens, config hashes,
+    container ids and log positions) to a JSON file, so a restarted
+    controller can adopt the containers it left running
+    The file is rewritten atomically, at most once per interval and only on change
+    """
+
+    def __init__(self, path: str = STATE_FILE, flush_interval_ms: int = 1000):
+        self.path = path
+        self.interval = max(1, int(flush_interval_ms)) / 1000.0
+        self.stop_event = threading.Event()
+        self.flush_thread: Optional[threading.Thread] = None
+        self.registry = None
+        self.last_saved: Optional[str] = None
+        self.lock = threading.Lock()
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns the saved entries by process id, empty if there is no usable state
+        """
+        try:
+            with open(self.path) as f:
+                entries = json.load(f).get("processes", [])
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError, AttributeError) as e:
+            logging.warning(f"Ignoring unreadable controller state {self.path}: {e}")
+            return {}
+        return {entry["id"]: entry for entry in entries if isinstance(entry, dict) and "id" in entry}
+
+    def save(self, entries: List[Dict[str, Any]]) -> None:
+        data = json.dumps({"processes": entries}, sort_keys=True, default=str)
+        with self.lock:
+            if data == self.last_saved:
+                return
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            temporary_path = f"{self.path}.tmp"
+            # The state holds API tokens, so only the controller may read it
+            descriptor = os.open(temporary_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(descriptor, "w") as f:
+                f.write(data)
+            os.chmod(temporary_path, 0o600)
+            os.replace(temporary_path, self.path)
+            self.last_saved = data
+
+    def clear(self) -> None:
+        self.save([])
+
+    def start(self, registry) -> None:
+        self.registry = registry
+        self.stop_event.clear()
+        self.flush_thread = threading.Thread(target=self._flush_loop, name="state_store", daemon=True)
+        self.flush_thread.start()
+
+    def stop(self) -> None:
+        self.stop_event.set()
+        if self.flush_thread:
+            self.flush_thread.join()
+
+    def flush(self) -> None:
+        if self.registry is not None:
+            self.save([self.entry(process_meta) for process_meta in self.registry.snapshot()])
+
+    @staticmethod
+    def entry(process_meta: Dict[str, Any]) -> Dict[str, Any]:
+        handle = process_meta["handle"]
+        container = handle.docker_container
+        if "config_hash" not in process_meta:
+            process_meta["config_hash"] = config_hash(process_meta["config"])
+        return {
+            "id": process_meta["id"],
+            "type": process_meta["type"],
+            "source": process_meta.get("source", "config"),
+            "config": process_meta["config"],
+            "config_hash": process_meta["config_hash"],
+            "tokens": [[token, permissions] for token, permissions in process_meta["token"].items() if token],
+            "container_id": container.id if container is not None else None,
+            "last_log_ns": handle.last_log_timestamp,
+            "log_sequence": handle.log_sequence,
+        }
+
+    def _flush_loop(self) -> None:
+        while not self.stop_event.wait(self.interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logging.error(f"Failed to save controller state: {e}")
@@ -0,0 +1,216 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from influxdb_client import Point, WritePrecision
+
+from globals import Config, Globals
+
+POLICIES = ("never", "on-failure", "always")
+
+
+class RestartPolicy:
+    """
+    When and how often a process is restarted after its container exits
+    The delay doubles with each consecutive restart up to max_backoff_ms and
+    resets once the container stays up for reset_after_s
+    """
+
+    def __init__(
+        self,
+        policy: str = "never",
+        max_restarts: int = 5,
+        backoff_ms: int = 1000,
+        max_backoff_ms: int = 60000,
+        reset_after_s: float = 300,
+    ):
+        if policy not in POLICIES:
+            raise RuntimeError(f"Invalid restart policy {policy}: use one of {', '.join(POLICIES)}")
+        self.policy = policy
+        self.max_restarts = int(max_restarts)
+        self.backoff = max(0, int(backoff_ms)) / 1000.0
+        self.max_backoff = max(0, int(max_backoff_ms)) / 1000.0
+        self.reset_after = float(reset_after_s)
+
+    @classmethod
+    def from_config(cls, restart_config) -> Optional["RestartPolicy"]:
+        """
+        Builds a policy from a process restart section: either a policy name
+        or {policy, max_restarts (-1 for unlimited), backoff_ms, max_backoff_ms, reset_after_s}
+        """
+        if not restart_config:
+            return None
+        if isinstance(restart_config, str):
+            return cls(restart_config)
+        return cls(
+            policy=restart_config.get("policy", "on-failure"),
+            max_restarts=restart_config.get("max_restarts", 5),
+            backoff_ms=restart_config.get("backoff_ms", 1000),
+            max_backoff_ms=restart_config.get("max_backoff_ms", 60000),
+            reset_after_s=restart_config.get("reset_after_s", 300),
+        )
+
+    def should_restart(self, exit_code: Optional[int], oom_killed: bool) -> bool:
+        if self.policy == "always":
+            return True
+        if self.policy == "on-failure":
+            return oom_killed or exit_code != 0
+        return False
+
+    def delay(self, consecutive_restarts: int) -> float:
+        return min(self.max_backoff, self.backoff * (2 ** consecutive_restarts))
+
+
+class Supervisor:
+    """
+    Restarts registered processes whose containers die, following each
+    process' restart policy, and reports every crash as a component_restart point
+    Containers stopped by the controller itself are never restarted
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self.executor = ThreadPoolExecutor(max_workers=max(1, int(max_workers)), thread_name_prefix="supervisor")
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()
+        self.restarting = set()
+        self.history: Dict[str, Dict[str, Any]] = {}
+
+    def handle_event(self, event: dict) -> None:
+        action = event.get("Action", "")
+        attributes = event.get("Actor", {}).get("Attributes", {})
+        component_id = attributes.get("name", "")
+        if not component_id:
+            return
+        if action == "oom":
+            with self.lock:
+                self._history(component_id)["oom_killed"] = True
+            return
+        if action != "die" or self.stop_event.is_set():
+            return
+
+        process_meta = Globals.process_registry.get(component_id)
+        if process_meta is None:
+            return
+        handle = process_meta["handle"]
+        if not hasattr(handle, "restart_policy") or handle.stopping:
+            return
+        # Crashes of processes without a restart section are still reported
+        policy = handle.restart_policy or RestartPolicy()
+        if handle.docker_container is not None and handle.docker_container.id != event.get("id"):
+            # A container the handle no longer owns
+            return
+
+        died_ns = event.get("timeNano") or time.time_ns()
+        detection_latency = max(0, time.time_ns() - died_ns) / 1e6
+        exit_code = attributes.get("exitCode")
+        exit_code = int(exit_code) if exit_code is not None else None
+
+        with self.lock:
+            if component_id in self.restarting:
+                return
+            history = self._history(component_id)
+            oom_killed = history.pop("oom_killed", False)
+            if history["started_ns"] and (died_ns - history["started_ns"]) / 1e9 >= policy.reset_after:
+                history["consecutive"] = 0
+            crashed = oom_killed or exit_code != 0
+            if crashed:
+                history["crashes"] += 1
+            restart = policy.should_restart(exit_code, oom_killed)
+            if restart and 0 <= policy.max_restarts <= history["restarts"]:
+                action_taken = "gave_up"
+                restart = False
+            else:
+                action_taken = "restarting" if restart else "not_restarted"
+            if restart:
+                self.restarting.add(component_id)
+                delay = policy.delay(history["consecutive"])
+            crash_count = history["crashes"]
+            restart_count = history["restarts"]
+
+        logging.warning(
+            f"{component_id} exited with code {exit_code}{' (OOM killed)' if oom_killed else ''}, "
+            f"detected after {detection_latency:.1f}ms: {action_taken.replace('_', ' ')}"
+        )
+        if not restart:
+            self._report(process_meta, action_taken, exit_code, oom_killed, crash_count, restart_count, detection_latency)
+            return
+        try:
+            self.executor.submit(
+                self._restart, process_meta, died_ns, delay, exit_code, oom_killed, crash_count, restart_count, detection_latency
+            )
+        except RuntimeError:
+            # Executor already shut down
+            with self.lock:
+                self.restarting.discard(component_id)
+
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        with self.lock:
+            return {
+                component_id: {"crashes": history["crashes"], "restarts": history["restarts"]}
+                for component_id, history in self.history.items()
+            }
+
+    def stop(self) -> None:
+        self.stop_event.set()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _restart(self, process_meta, died_ns, delay, exit_code, oom_killed, crash_count, restart_count, detection_latency):
+        component_id = process_meta["id"]
+        handle = process_meta["handle"]
+        try:
+            if self.stop_event.wait(delay) or handle.stopping:
+                return
+            if Globals.process_registry.get(component_id) is not process_meta:
+                return
+            logging.info(f"Restarting {component_id} after {delay:.1f}s backoff")
+            handle.restart()
+            if handle.readiness and not handle.wait_ready():
+                raise RuntimeError(f"not ready: {', '.join(handle.readiness.pending())}")
+        except Exception as e:
+            logging.error(f"Failed to restart {component_id}: {e}")
+            self._report(process_meta, "failed", exit_code, oom_killed, crash_count, restart_count, detection_latency)
+            return
+        finally:
+            with self.lock:
+                self.restarting.discard(component_id)
+
+        restarted_ns = time.time_ns()
+        restart_latency = (restarted_ns - died_ns) / 1e6
+        with self.lock:
+            history = self._history(component_id)
+            history["restarts"] += 1
+            history["consecutive"] += 1
+            history["started_ns"] = restarted_ns
+            restart_count = history["restarts"]
+        logging.info(f"Restarted {component_id} {restart_latency:.1f}ms after it exited")
+        self._report(
+            process_meta, "restarted", exit_code, oom_killed, crash_count, restart_count, detection_latency, restart_latency
+        )
+
+    def _report(
+        self, process_meta, action_taken, exit_code, oom_killed, crash_count, restart_count, detection_latency, restart_latency=None
+    ):
+        point = (
+            Point("component_restart")
+            .tag("id", process_meta["id"])
+            .tag("type", process_meta["type"])
+            .tag("action", action_taken)
+            .field("exit_code", exit_code if exit_code is not None else -1)
+            .field("oom_killed", oom_killed)
+            .field("crash_count", crash_count)
+            .field("restart_count", restart_count)
+            .field("detection_latency_ms", detection_latency)
+        )
+        if restart_latency is not None:
+            point = point.field("restart_latency_ms", restart_latency)
+        point = point.time(time.time_ns(), WritePrecision.NS)
+        Config.log_writer.submit(process_meta["id"], point.to_line_protocol())
+
+    def _history(self, component_id: str) -> Dict[str, Any]:
+        history = self.history.get(component_id)
+        if history is None:
+            history = {"crashes": 0, "restarts": 0, "consecutive": 0, "started_ns": None}
+            self.history[component_id] = history
+        return history
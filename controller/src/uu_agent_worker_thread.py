@@ -4,9 +4,9 @@ import logging
 from worker_thread import WorkerThread
 
 class uu_agent(WorkerThread):
-    def start(self):
-        self.config.image_name = "ghcr.io/oran-testing/uu-agent"
-        self.cleanup_old_containers()
+    image_name = "ghcr.io/oran-testing/uu-agent"
+
+    def prepare(self):
         self.setup_env()
         self.setup_networks()
 
@@ -16,10 +16,11 @@ class uu_agent(WorkerThread):
         iq_output_dir = f"{os.getenv('DOCKER_SYSTEM_DIRECTORY')}/.uuagent_results"
         self.config.container_volumes[iq_output_dir] = {"bind": "/output/", "mode": "rw"}
         
-        self._cleanup_old_iq_files(iq_output_dir)
+        # An adopted container is still writing its IQ files
+        if self.adopted_container is None:
+            self._cleanup_old_iq_files(iq_output_dir)
         
         self.setup_volumes()
-        self.start_container()
     
     def _cleanup_old_iq_files(self, iq_output_dir):
         """Remove old IQ files to preserve disk space"""
@@ -1,18 +1,24 @@
-import asyncio
-import configparser
 import logging
 import os
-import threading
 import time
 import uuid
-from datetime import datetime
 from enum import Enum
 
 import docker
 from docker.client import DockerClient
-from docker.types import IPAMConfig, IPAMPool
-from influxdb_client import InfluxDBClient, WriteApi
-from influxdb_client.client.write_api import SYNCHRONOUS
+from influxdb_client import InfluxDBClient, Point, WritePrecision
+
+from container_status import ContainerStatusTable
+from controller_metrics import LOG_LINES
+from globals import Config
+from image_index import ImageIndex
+from log_buffer import DEFAULT_CAPACITY, LogRingBuffer
+from log_multiplexer import LogMultiplexer
+from log_writer import LogBatchWriter
+from metrics_parser import PARSER_REGISTRY
+from network_manager import NetworkManager
+from readiness import build_readiness
+from supervisor import RestartPolicy
 
 
 class RfType(Enum):
@@ -25,7 +31,13 @@ class WorkerThreadConfig:
     def __init__(self):
         self.process_config: dict = None
         self.influxdb_client: InfluxDBClient = None
+        self.log_writer: LogBatchWriter = None
+        self.log_multiplexer: LogMultiplexer = None
+        self.log_schema: str = "compact"
         self.docker_client: DockerClient = None
+        self.image_index: ImageIndex = None
+        self.network_manager: NetworkManager = None
+        self.container_status: ContainerStatusTable = None
         self.config_file: str = ""
         self.container_id: str = ""
         self.cli_args: list[str] = []
@@ -38,16 +50,36 @@ class WorkerThreadConfig:
         self.container_privileged = True
         self.device_requests = []
         self.host_network = False
+        self.container_labels = {}
+        self.create_only = False
 
 
 class WorkerThread:
+    image_name: str = ""
+
     def __init__(self, influxdb_client, docker_client, process_config):
         self.docker_container = None
-        self.docker_logs = None
+        self.adopted_container = None
+        self.adopted_since_ns = None
+        self.stopping = False
+        self.log_sequence = 0
+        self.last_log_timestamp = 0
+        self.start_began = None
+        self.start_timings = {}
         self.config = WorkerThreadConfig()
         self.config.process_config = process_config
         self.config.influxdb_client = influxdb_client
-        self.config.docker_client = docker_client
+        self.config.log_writer = Config.log_writer
+        self.config.log_schema = Config.log_schema
+
+        # Docker services of the node the process is placed on
+        self.node = Config.cluster.node(process_config.get("node")) if Config.cluster else None
+        services = self.node or Config
+        self.config.docker_client = self.node.docker_client if self.node else docker_client
+        self.config.log_multiplexer = services.log_multiplexer
+        self.config.image_index = services.image_index
+        self.config.network_manager = services.network_manager
+        self.config.container_status = services.container_status
         if "config_file" in process_config.keys():
             self.config.config_file = process_config["config_file"]
 
@@ -80,20 +112,31 @@ class WorkerThread:
 
         self.config.host_network = bool(process_config.get("host_network", False))
 
+        self.metrics_parsers = PARSER_REGISTRY.create(process_config)
+        self.readiness = build_readiness(process_config.get("readiness"), self)
+        self.restart_policy = RestartPolicy.from_config(process_config.get("restart"))
+        self.log_buffer = LogRingBuffer(
+            (Config.options or {}).get("log_buffer_lines", DEFAULT_CAPACITY)
+        )
+
+    def record_timing(self, stage, began):
+        self.start_timings[stage] = time.monotonic() - began
+
     def cleanup_old_containers(self):
+        self.start_began = time.monotonic()
+        self.start_timings = {}
+
         # Verify Image
-        image_exists = False
-        for img in self.config.docker_client.images.list():
-            image_tags = [image_tag.split(":")[0] for image_tag in img.tags]
-            if self.config.image_name in image_tags:
-                image_exists = True
-                break
-        if not image_exists:
+        if not self.config.image_index.contains(self.config.image_name):
             raise RuntimeError(
                 f"Required Docker image {self.config.image_name} not found: Please run 'sudo docker compose --profile components build' or 'sudo docker compose --profile components pull'"
             )
+        self.record_timing("image_check", self.start_began)
+        if self.adopted_container is not None:
+            return
 
         # Remove old container
+        cleanup_began = time.monotonic()
         try:
             old_container = self.config.docker_client.containers.get(
                 self.config.container_id
@@ -104,6 +147,7 @@ class WorkerThread:
             logging.debug(f"Container '{self.config.container_id}' does not exist.")
         except Exception as e:
             raise RuntimeError(f"Failed to remove old container: {e}")
+        self.record_timing("container_cleanup", cleanup_began)
 
     def setup_volumes(self):
         self.config.container_volumes["/tmp"] = {"bind": "/tmp", "mode": "rw"}
@@ -135,144 +179,310 @@ class WorkerThread:
             self.config.container_env["UHD_IMAGES_DIR"] = "/usr/local/share/uhd"
 
     def setup_networks(self):
-        self.config.container_networks.append(
-            self.config.docker_client.networks.get("rt_metrics")
-        )
+        self.config.network_manager.get("rt_metrics")
+        self.config.container_networks.append("rt_metrics")
 
         if self.config.rf_type == RfType.ZMQ:
-            try:
-                self.config.container_networks.append(
-                    self.config.docker_client.networks.get("rt_zmq")
-                )
-            except docker.errors.NotFound:
-                ipam_pool = IPAMPool(
-                    subnet=self.config.rf_config["tcp_subnet"],
-                    gateway=self.config.rf_config["gateway"],
-                )
-                ipam_config = IPAMConfig(pool_configs=[ipam_pool])
-                self.config.container_networks.append(
-                    self.config.docker_client.networks.create(
-                        name="rt_zmq",
-                        driver="bridge",
-                        ipam=ipam_config,
-                        check_duplicate=True,
-                    )
-                )
+            self.config.network_manager.ensure(
+                "rt_zmq",
+                subnet=self.config.rf_config["tcp_subnet"],
+                gateway=self.config.rf_config["gateway"],
+            )
+            self.config.container_networks.append("rt_zmq")
 
-    def start_container(self):
+    def create_container(self) -> bool:
+        """
+        Creates the container and attaches its networks without starting it
+        """
+        create_began = time.monotonic()
         try:
             if self.config.host_network:
-                self.docker_container = self.config.docker_client.containers.run(
+                self.docker_container = self.config.docker_client.containers.create(
                     image=self.config.image_name,
                     name=self.config.container_id,
                     environment=self.config.container_env,
                     volumes=self.config.container_volumes,
+                    labels=self.config.container_labels,
                     privileged=True,
                     cap_add=["SYS_NICE", "SYS_PTRACE"],
                     detach=True,
                     device_requests=self.config.device_requests,
                     network_mode="host",
                 )
+                self.record_timing("container_create", create_began)
             else:
-                self.docker_container = self.config.docker_client.containers.run(
+                network_arguments, late_networks = self.config.network_manager.create_arguments(
+                    self.config.container_networks
+                )
+                self.docker_container = self.config.docker_client.containers.create(
                     image=self.config.image_name,
                     name=self.config.container_id,
                     environment=self.config.container_env,
                     volumes=self.config.container_volumes,
+                    labels=self.config.container_labels,
                     privileged=True,
                     cap_add=["SYS_NICE", "SYS_PTRACE"],
                     detach=True,
                     device_requests=self.config.device_requests,
+                    **network_arguments,
                 )
+                self.record_timing("container_create", create_began)
 
-                for network in self.config.container_networks:
-                    network.connect(self.docker_container)
-            self.docker_logs = self.docker_container.logs(stream=True, follow=True)
+                if late_networks:
+                    connect_began = time.monotonic()
+                    for network_name in late_networks:
+                        self.config.network_manager.get(network_name).connect(self.docker_container)
+                    self.record_timing("network_connect", connect_began)
 
+        except docker.errors.APIError as e:
+            logging.error(f"Failed to create Docker container: {e}")
+            return False
+        return True
+
+    def run_container(self):
+        """
+        Starts the created container and begins streaming its logs
+        """
+        self.stopping = False
+        if self.readiness:
+            self.readiness.reset()
+        self.log_buffer.open()
+        run_began = time.monotonic()
+        try:
+            self.docker_container.start()
         except docker.errors.APIError as e:
             logging.error(f"Failed to start Docker container: {e}")
             return
+        self.record_timing("container_start", run_began)
+        self.attach_logs()
+
+    def attach_logs(self, since_ns=None):
+        self.config.log_multiplexer.attach(
+            self.config.container_id,
+            self.docker_container.id,
+            self.handle_log_line,
+            self.is_running,
+            since_ns=since_ns,
+        )
+
+    def start_container(self):
+        if self.adopted_container is not None:
+            self.docker_container = self.adopted_container
+            self.log_buffer.open()
+            self.attach_logs(self.adopted_since_ns)
+            return
+        if not self.create_container():
+            return
+        if self.config.create_only:
+            return
+        self.run_container()
 
-        self.stop_thread = threading.Event()
-        self.log_thread = threading.Thread(target=self.log_report_thread, daemon=True)
-        self.log_thread.start()
+    def start_pooled(self, container):
+        """
+        Starts a pre-created container from the warm pool as this process
+        """
+        self.config.image_name = self.image_name
+        self.cleanup_old_containers()
+        self.reset_container_config()
+        self.prepare()
+        container.rename(self.config.container_id)
+        self.docker_container = container
+        self.run_container()
+
+    def reset_container_config(self):
+        """
+        Clears what prepare() fills in, so preparing the same handle again,
+        as a start after a failed adoption does, adds nothing twice
+        """
+        self.config.container_env = {}
+        self.config.container_volumes = {}
+        self.config.container_networks = []
+        self.config.device_requests = []
+        self.config.host_network = bool(self.config.process_config.get("host_network", False))
+
+    def prepare(self):
+        """
+        Fills in the environment, networks and volumes of the container
+        """
+        raise RuntimeError("prepare behavior must be defined by individual worker class")
 
     def start(self):
-        raise RuntimeError("start behavior must be defined by individual worker class")
+        self.config.image_name = self.image_name
+        self.cleanup_old_containers()
+        self.reset_container_config()
+        self.prepare()
+        self.start_container()
+
+    def adopt(self, container, since_ns=None, log_sequence=0):
+        """
+        Takes over a container left running by a previous controller:
+        prepares the configuration as start() does, so later restarts work,
+        but keeps the container and follows its logs after since_ns
+        """
+        self.adopted_container = container
+        self.adopted_since_ns = since_ns
+        self.last_log_timestamp = since_ns or 0
+        self.log_sequence = log_sequence
+        try:
+            self.start()
+        finally:
+            self.adopted_container = None
+            self.adopted_since_ns = None
+        if self.docker_container is not container:
+            raise RuntimeError(f"Failed to adopt container of {self.config.container_id}")
+        self.start_began = None
+        if self.readiness:
+            self.readiness.mark_ready()
+
+    def wait_ready(self, timeout=None) -> bool:
+        """
+        Blocks until all readiness probes pass, True when none are declared
+        """
+        if not self.readiness:
+            return True
+        ready = self.readiness.wait(timeout)
+        if ready and self.start_began is not None:
+            self.record_timing("ready", self.start_began)
+        return ready
 
-    def stop(self):
+    def restart(self):
         """
-        Stops current container if running
-        Stops log reporting thread
+        Replaces the container with a new one from the same, already
+        prepared configuration; used by the supervisor after a crash
         """
+        self.config.log_multiplexer.detach(self.config.container_id)
+        self.cleanup_old_containers()
+        if not self.create_container():
+            raise RuntimeError(f"Failed to create container for {self.config.container_id}")
+        self.run_container()
+        if not self.is_running():
+            raise RuntimeError(f"Container for {self.config.container_id} did not start")
+
+    def stop(self, timeout=None):
+        """
+        Stops current container if running, killing it after timeout seconds
+        (Docker's default grace period when None)
+        Stops log streaming
+        """
+        self.stopping = True
+        self.config.log_multiplexer.detach(self.config.container_id)
+        self.log_buffer.close()
         if self.docker_container:
             try:
-                self.docker_container.stop()
+                self.docker_container.stop(timeout=timeout)
                 self.docker_container.remove()
                 logging.info(
                     f"Docker container stopped and removed: {self.docker_container.name}"
                 )
             except docker.errors.APIError as e:
                 logging.error(f"Failed to stop Docker container: {e}")
-        self.stop_thread.set()
+
+    def is_running(self) -> bool:
+        try:
+            self.docker_container.reload()
+        except docker.errors.NotFound:
+            return False
+        except docker.errors.APIError as e:
+            logging.warning(f"[{self.config.container_id}]: status check failed: {e}")
+            return True
+        return bool(self.docker_container.attrs["State"]["Running"])
 
     def get_status(self):
+        """
+        Answers from the event-driven status table of the process's node,
+        inspecting the container only if no event about it has been seen yet
+        """
+        status = self._get_status()
+        if self.node is not None:
+            status["node"] = self.node.name
+        return status
+
+    def _get_status(self):
+        status_table = self.config.container_status
+        status = status_table.get(self.config.container_id) if status_table else None
+        if status is not None:
+            return status
+        if self.docker_container is None:
+            return {"id": self.config.container_id, "healthy": False, "state": "not created"}
         self.docker_container.reload()
         info = self.docker_container.attrs
-        if info["State"]["Running"]:
-            return {
-                "id": self.config.container_id,
-                "healthy": True,
-                info["Image"]: info["State"],
-            }
+        if status_table:
+            status_table.update(info)
+            return status_table.get(self.config.container_id)
         return {
             "id": self.config.container_id,
-            "healthy": False,
-            "exit_code": info["State"]["ExitCode"],
+            "healthy": info["State"]["Running"],
+            "state": info["State"]["Status"],
+            "exit_code": None if info["State"]["Running"] else info["State"]["ExitCode"],
         }
 
-    def send_message(self, message_text):
-        with self.config.influxdb_client.write_api(
-            write_options=SYNCHRONOUS
-        ) as write_api:
-            try:
-                utc_timestamp = datetime.utcnow()
-                formatted_timestamp = utc_timestamp.strftime("%Y-%m-%dT%H:%M:%SZ")
-                self.influx_push(
-                    write_api,
-                    bucket="rtusystem",
-                    record_time_key="time",
-                    record={
-                        "measurement": "component_log",
-                        "tags": {
-                            "id": f"{self.config.container_id}",
-                            "msg_uuid": uuid.uuid4(),
-                        },
-                        "fields": {"stdout_log": message_text},
-                        "time": formatted_timestamp,
-                    },
-                )
-                logging.debug(f"[{self.config.container_id}]: {message_text}")
-            except Exception as e:
-                logging.error(f"send_message failed with error: {e}")
+    def send_message(self, message_text, timestamp_ns=None):
+        """
+        Queues one component_log point
+        compact schema: Docker timestamp made unique per component plus a seq field
+        legacy schema: tags every line with a msg_uuid as older dashboards expect
+        """
+        timestamp_ns = timestamp_ns or time.time_ns()
+        if timestamp_ns <= self.last_log_timestamp:
+            timestamp_ns = self.last_log_timestamp + 1
+        self.last_log_timestamp = timestamp_ns
+        self.log_sequence += 1
 
-    def influx_push(self, write_api: WriteApi, *args, **kwargs) -> None:
-        while True:
-            try:
-                write_api.write(*args, **kwargs)
-                break
-            except ConnectionError as e:
-                logging.warning(f"Error pushing data: {e}. Retrying...")
-                time.sleep(1)
-
-    def log_report_thread(self):
-        while not self.stop_thread.is_set():
-            line = next(self.docker_logs, None)
-            if not line:
+        point = Point("component_log").tag("id", self.config.container_id)
+        if self.config.log_schema == "legacy":
+            point = point.tag("msg_uuid", str(uuid.uuid4()))
+        else:
+            point = point.field("seq", self.log_sequence)
+        point = point.field("stdout_log", message_text).time(
+            timestamp_ns, WritePrecision.NS
+        )
+        if not self.config.log_writer.submit(
+            self.config.container_id, point.to_line_protocol()
+        ):
+            logging.debug(f"[{self.config.container_id}]: log queue full, line dropped")
+            return
+        logging.debug(f"[{self.config.container_id}]: {message_text}")
+
+    def send_metrics(self, line, timestamp_ns):
+        for parser in self.metrics_parsers:
+            sample = parser.parse(line)
+            if not sample:
                 continue
-            if isinstance(line, bytes):
-                line = line.decode("utf-8", errors="replace")
-            if isinstance(line, tuple) or isinstance(line, list):
-                line = str(line[0])
+            tags, fields = sample
+            point = Point(parser.measurement).tag("id", self.config.container_id)
+            for key, value in tags.items():
+                point = point.tag(key, value)
+            for key, value in fields.items():
+                point = point.field(key, value)
+            point = point.time(timestamp_ns, WritePrecision.NS)
+            self.config.log_writer.submit(
+                self.config.container_id, point.to_line_protocol()
+            )
+
+    def report_start_timings(self):
+        """
+        Writes the start latency breakdown once the first log line arrives
+        """
+        self.record_timing("first_log_line", self.start_began)
+        logging.info(
+            f"[{self.config.container_id}]: start latency "
+            + ", ".join(f"{stage}={seconds * 1000:.1f}ms" for stage, seconds in self.start_timings.items())
+        )
+        point = Point("component_startup").tag("id", self.config.container_id)
+        for stage, seconds in self.start_timings.items():
+            point = point.field(f"{stage}_ms", seconds * 1000)
+        self.config.log_writer.submit(self.config.container_id, point.to_line_protocol())
 
-            self.send_message(line.strip())
+    def handle_log_line(self, line: str, timestamp_ns=None):
+        if self.start_began is not None and "first_log_line" not in self.start_timings:
+            self.report_start_timings()
+        line = line.strip()
+        if not line:
+            return
+        LOG_LINES.inc(component=self.config.container_id)
+        if self.readiness and not self.readiness.is_ready():
+            self.readiness.observe(line)
+        self.send_message(line, timestamp_ns)
+        self.log_buffer.append(self.last_log_timestamp, line)
+        if self.metrics_parsers:
+            self.send_metrics(line, self.last_log_timestamp)
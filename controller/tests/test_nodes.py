@@ -0,0 +1,169 @@
+import os
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from nodes import Cluster  # noqa: E402
+from process_registry import ProcessRegistry  # noqa: E402
+
+
+class FakeEventStream:
+    """
+    Docker event stream that stays open, without events, until closed
+    """
+
+    def __init__(self):
+        self.closed = threading.Event()
+
+    def __iter__(self):
+        self.closed.wait()
+        return iter(())
+
+    def close(self):
+        self.closed.set()
+
+
+class FakeCollection:
+    def list(self, **kwargs):
+        return []
+
+
+class FakeApi:
+    api_version = "1.45"
+
+
+class FakeDockerClient:
+    """
+    The part of DockerClient a Node uses when it starts
+    """
+
+    def __init__(self, docker_host):
+        self.docker_host = docker_host
+        self.api = FakeApi()
+        self.images = FakeCollection()
+        self.containers = FakeCollection()
+        self.streams = []
+
+    def events(self, decode=True, since=None):
+        stream = FakeEventStream()
+        self.streams.append(stream)
+        return stream
+
+
+class FakeLogMultiplexer:
+    def __init__(self, docker_url, api_version, reconnect_delay_ms=1000):
+        self.docker_url = docker_url
+        self.api_version = api_version
+        self.started = False
+
+    def start(self):
+        self.started = True
+
+    def stop(self):
+        self.started = False
+
+    def attached_count(self):
+        return 0
+
+
+NODES = {
+    "local": {"cpus": 4, "b200_serials": ["A"]},
+    "lab2": {"docker_host": "tcp://10.0.0.2:2375", "cpus": 8, "b200_serials": ["B", "C"], "host_network": False},
+}
+
+
+def process(process_id, cpus=1, rf=None, **extra):
+    return dict({"id": process_id, "type": "rtue", "cpus": cpus, "rf": rf or {"type": "none"}}, **extra)
+
+
+class ClusterPlacementTest(unittest.TestCase):
+    def setUp(self):
+        self.registry = ProcessRegistry()
+        self.cluster = Cluster.from_config(
+            NODES, self.registry, client_factory=FakeDockerClient, multiplexer_factory=FakeLogMultiplexer
+        )
+
+    def run_process(self, process_config, **kwargs):
+        """
+        Places a process and registers it, as a successful start does
+        """
+        node = self.cluster.place(process_config, **kwargs)
+        self.registry.add({
+            "id": process_config["id"],
+            "type": process_config["type"],
+            "config": process_config,
+            "handle": None,
+            "token": {None: []},
+        })
+        self.cluster.settle([process_config["id"]])
+        return node.name
+
+    def test_nodes_start_with_fake_clients(self):
+        for node in self.cluster.nodes.values():
+            node.start()
+        try:
+            self.assertTrue(all(node.log_multiplexer.started for node in self.cluster.nodes.values()))
+            self.assertEqual(self.cluster.node("lab2").log_multiplexer.docker_url, "tcp://10.0.0.2:2375")
+        finally:
+            self.cluster.stop()
+        self.assertTrue(all(stream.closed.is_set() for stream in self.cluster.node("lab2").docker_client.streams))
+
+    def test_most_free_cpus_first(self):
+        self.assertEqual(self.run_process(process("ue1")), "lab2")
+
+    def test_cpu_capacity(self):
+        self.assertEqual(self.run_process(process("big", cpus=7)), "lab2")
+        self.assertEqual(self.run_process(process("ue1", cpus=2)), "local")
+        self.assertEqual(self.run_process(process("ue2", cpus=1)), "local")
+        with self.assertRaisesRegex(RuntimeError, "No node can run ue3"):
+            self.cluster.place(process("ue3", cpus=2))
+
+    def test_pending_placements_hold_capacity(self):
+        self.assertEqual(self.cluster.place(process("ue1", cpus=8)).name, "lab2")
+        self.assertEqual(self.cluster.place(process("ue2", cpus=4)).name, "local")
+        self.cluster.settle(["ue1", "ue2"])
+        self.assertEqual(self.cluster.place(process("ue3", cpus=8)).name, "lab2")
+
+    def test_b200_serial_pinning(self):
+        self.assertEqual(self.run_process(process("ue1", rf={"type": "b200", "serial": "A"})), "local")
+        self.assertEqual(self.run_process(process("ue2", rf={"type": "b200", "serial": "C"})), "lab2")
+        with self.assertRaisesRegex(RuntimeError, "does not have B200 A free"):
+            self.cluster.place(process("ue3", rf={"type": "b200", "serial": "A"}))
+        # One unpinned B200 left, on lab2
+        self.assertEqual(self.run_process(process("ue4", rf={"type": "b200"})), "lab2")
+        with self.assertRaisesRegex(RuntimeError, "no free B200"):
+            self.cluster.place(process("ue5", rf={"type": "b200"}))
+
+    def test_host_network(self):
+        self.assertEqual(self.run_process(process("ue1", host_network=True)), "local")
+        ofh = dict(process("ofh1"), type="ofh_attacker")
+        self.assertEqual(self.run_process(ofh), "local")
+        with self.assertRaisesRegex(RuntimeError, "does not allow host_network"):
+            self.cluster.place(process("ue2", host_network=True, node="lab2"))
+
+    def test_zmq_processes_share_a_node(self):
+        zmq = {"type": "zmq", "tcp_subnet": "10.0.0.0/24", "gateway": "10.0.0.1"}
+        self.assertEqual(self.run_process(process("gnb", rf=zmq)), "lab2")
+        self.assertEqual(self.run_process(process("big", cpus=4)), "lab2")
+        # local has more CPUs free now, but ZMQ stays with gnb
+        self.assertEqual(self.run_process(process("ue1", rf=zmq)), "lab2")
+        with self.assertRaisesRegex(RuntimeError, "is not the ZMQ node lab2"):
+            self.cluster.place(process("ue2", rf=zmq, node="local"))
+
+    def test_leaving_processes_free_their_capacity(self):
+        self.run_process(process("ue1", cpus=8))
+        self.run_process(process("ue2", cpus=4))
+        with self.assertRaises(RuntimeError):
+            self.cluster.place(process("ue3", cpus=8))
+        self.assertEqual(self.cluster.place(process("ue3", cpus=8), leaving=["ue1"]).name, "lab2")
+
+    def test_pinned_node(self):
+        self.assertEqual(self.run_process(process("ue1", node="local")), "local")
+        with self.assertRaisesRegex(RuntimeError, "Unknown node"):
+            self.cluster.place(process("ue2", node="nope"))
+
+
+if __name__ == "__main__":
+    unittest.main()
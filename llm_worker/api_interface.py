@@ -1,3 +1,4 @@
+import json
 import urllib3
 import requests
 import logging
@@ -13,6 +14,8 @@ class ApiInterface():
         self.control_url = f"https://{control_ip}:{control_port}"
         self.auth_header = f"Bearer {control_token}"
         self.headers = {}
+        # One session keeps the TLS connection to the controller alive between requests
+        self.session = requests.Session()
 
     def make_request(self, target_endpoint, payload=None):
         if(payload):
@@ -24,8 +27,10 @@ class ApiInterface():
         logging.info(f"Sending POST to {target_endpoint} with JSON:\n {json_payload}")
         self.headers = {"Authorization": self.auth_header, "Accept": "application/json", "User-Agent": "llm_worker/1.0", "Content-Type": "application/json"}
         try:
-            response = requests.post(url=f"{self.control_url}/{target_endpoint}", headers=self.headers, json=json_payload, verify=False)
+            response = self.session.post(url=f"{self.control_url}/{target_endpoint}", headers=self.headers, json=json_payload, verify=False)
             if response.status_code == 200:
+                if response.headers.get("Content-Type", "").startswith("application/x-ndjson"):
+                    return True, self._parse_log_page(response.iter_lines())
                 return True, response.json()
             return False, {"error": response.text}
         except requests.exceptions.RequestException as e:
@@ -35,9 +40,45 @@ class ApiInterface():
         logging.info(f"Sending GET to {target_endpoint}")
         self.headers = {"Authorization": self.auth_header, "Accept": "application/json", "User-Agent": "llm_worker/1.0"}
         try:
-            response = requests.get(url=f"{self.control_url}/{target_endpoint}", headers=self.headers, verify=False)
+            response = self.session.get(url=f"{self.control_url}/{target_endpoint}", headers=self.headers, verify=False)
             if response.status_code == 200:
                 return True, response.json()
             return False, {"error": response.text}
         except requests.exceptions.RequestException as e:
             return False, {"error":str(e)}
+
+    def _parse_log_page(self, lines):
+        """
+        Collects an NDJSON /logs response into {"logs": [...], "next_cursor", "complete"}
+        """
+        page = {"logs": []}
+        for line in lines:
+            if not line:
+                continue
+            row = json.loads(line)
+            if "message" in row:
+                page["logs"].append(row)
+            else:
+                page.update(row)
+        return page
+
+    def iter_logs(self, component_id, component_type, since=None, until=None, page_size=1000):
+        """
+        Yields every log line of a component, requesting one page at a time
+        Resume later by passing the last page's next_cursor as since
+        """
+        payload = {"id": component_id, "type": component_type, "limit": page_size}
+        if since:
+            payload["cursor"] = since
+        if until:
+            payload["until"] = until
+        while True:
+            success, page = self._post_endpoint("logs", payload)
+            if not success:
+                raise RuntimeError(f"Failed to read logs of {component_id}: {page.get('error')}")
+            yield from page["logs"]
+            if "error" in page:
+                raise RuntimeError(f"Log stream of {component_id} ended early: {page['error']}")
+            if page.get("complete", True):
+                return
+            payload["cursor"] = page["next_cursor"]
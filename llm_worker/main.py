@@ -316,6 +316,7 @@ if __name__ == '__main__':
 
     payload_log = open(os.path.join(Config.results_dir, "messages.txt"), "a")
 
+    requests_to_send = []
     for plan_item in finalized_plan:
         api_payload = {}
         if plan_item.get("endpoint") == "start":
@@ -339,20 +340,47 @@ if __name__ == '__main__':
                 if key in ["endpoint"]:
                     continue
                 api_payload[key] = val
+        requests_to_send.append((plan_item.get("endpoint"), api_payload))
 
-        payload_log.write(f"Sending to endpoint {plan_item.get('endpoint')}:\n{api_payload}\n\n")
+    # Consecutive start or stop items go to the controller as one batch request
+    batched_requests = []
+    for endpoint, api_payload in requests_to_send:
+        if endpoint in ("start", "stop") and batched_requests and batched_requests[-1][0] == endpoint:
+            batched_requests[-1][1].append(api_payload)
+        else:
+            batched_requests.append((endpoint, [api_payload]))
+
+    for endpoint, api_payloads in batched_requests:
+        if len(api_payloads) > 1 and endpoint == "start":
+            endpoint, api_payload = "start/batch", {"components": api_payloads}
+        elif len(api_payloads) > 1 and endpoint == "stop":
+            endpoint, api_payload = "stop/batch", {"ids": [p.get("id") for p in api_payloads]}
+        else:
+            api_payload = api_payloads[0]
+
+        payload_log.write(f"Sending to endpoint {endpoint}:\n{api_payload}\n\n")
         api_successful = True
         api_res = {}
-        if api_payload:
-            api_successful, api_res = api.make_request(plan_item.get("endpoint"), payload=api_payload)
+        if endpoint == "logs":
+            # One /logs request returns a single page, so follow the cursor to the end
+            try:
+                api_res = {"logs": list(api.iter_logs(api_payload.get("id"), api_payload.get("type")))}
+            except RuntimeError as e:
+                api_successful, api_res = False, {"error": str(e)}
+        elif api_payload:
+            api_successful, api_res = api.make_request(endpoint, payload=api_payload)
         else:
-            api_successful, api_res = api.make_request(plan_item.get("endpoint"))
+            api_successful, api_res = api.make_request(endpoint)
 
         if not api_successful:
             logging.error(f"API REQUEST FAILED: {json.dumps(api_res, indent=2)}")
             continue
 
-        payload_log.write(f"Got result from {plan_item.get('endpoint')}:\n{api_res}\n\n")
+        for result in api_res.get("results", []):
+            if result.get("status") != 200:
+                logging.error(f"API REQUEST FAILED for {result.get('id')}: {json.dumps(result, indent=2)}")
+
+        payload_log.write(f"Got result from {endpoint}:\n{api_res}\n\n")
         time.sleep(2)
 
     payload_log.close()